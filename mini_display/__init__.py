@@ -2,10 +2,19 @@
 
 __version__ = "0.1.0"
 
-from mini_display.display import main
-from mini_display.plugin_base import Plugin
-from mini_display.plugin_adapter import PluginAdapter
-from mini_display.plugins import ClockPlugin, WeatherPlugin, SubwayPlugin
+import importlib
+
+# Public names are imported on first access (PEP 562), so importing the
+# package, or a single submodule of it, does not pull in every plugin and
+# its dependencies.
+_EXPORTS = {
+    "Plugin": "mini_display.plugin_base",
+    "PluginAdapter": "mini_display.plugin_adapter",
+    "ClockPlugin": "mini_display.plugins",
+    "WeatherPlugin": "mini_display.plugins",
+    "SubwayPlugin": "mini_display.plugins",
+    "main": "mini_display.display",
+}
 
 __all__ = [
     "Plugin",
@@ -14,4 +23,17 @@ __all__ = [
     "WeatherPlugin",
     "SubwayPlugin",
     "main",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Arrival store - bounded top-K of upcoming arrivals per station and direction.
+
+Each arrival is packed into a single int, (epoch << 8) | (route index << 1) |
+direction bit, so records sort by time, compare in C and cost one small
+object each. A busy transfer hub on many routes therefore costs the same
+memory and time as a quiet stop: each (station, direction) keeps only its K
+earliest arrivals in a bounded heap, however many trips the feeds list.
+"""
+
+import heapq
+from typing import Dict, List, Sequence, Tuple
+
+# Route indexes are packed into 7 bits
+MAX_ROUTES = 128
+
+
+def pack(epoch: int, route: int, direction: str) -> int:
+    """Pack an arrival; direction is "N" (uptown) or anything else (downtown)."""
+    return (epoch << 8) | (route << 1) | (direction != "N")
+
+
+def unpack(record: int) -> Tuple[int, int, str]:
+    """Inverse of pack(): (epoch, route index, direction)."""
+    return record >> 8, (record >> 1) & 0x7F, "S" if record & 1 else "N"
+
+
+def packed_time(epoch: int) -> int:
+    """Smallest packed record at or after epoch, for bisecting a timeline."""
+    return epoch << 8
+
+
+class ArrivalHeap:
+    """Keeps the K earliest arrivals pushed into it."""
+
+    __slots__ = ("capacity", "_heap")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        # Max-heap by negation: the root is the latest arrival kept
+        self._heap: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, record: int) -> None:
+        """Add a packed arrival, dropping the latest one if over capacity."""
+        heap = self._heap
+        if len(heap) < self.capacity:
+            heapq.heappush(heap, -record)
+        elif -record > heap[0]:
+            heapq.heapreplace(heap, -record)
+
+    def records(self) -> List[int]:
+        """Packed arrivals, earliest first."""
+        return sorted(-r for r in self._heap)
+
+
+class ArrivalStore:
+    """Top-K upcoming arrivals for each (station, direction) pair."""
+
+    __slots__ = ("routes", "capacity", "_route_index", "_heaps")
+
+    def __init__(self, routes: Sequence[str], capacity: int):
+        """
+        Args:
+            routes: Route IDs; arrivals record their index in this list
+            capacity: Arrivals kept per station and direction
+
+        Raises:
+            ValueError: If there are more routes than fit in a record
+        """
+        if len(routes) > MAX_ROUTES:
+            raise ValueError(f"At most {MAX_ROUTES} routes are supported, got {len(routes)}")
+        self.routes = list(routes)
+        self.capacity = capacity
+        self._route_index = {r: i for i, r in enumerate(self.routes)}
+        self._heaps: Dict[Tuple[int, bool], ArrivalHeap] = {}
+
+    def add(self, station: int, route: str, direction: str, epoch: int) -> None:
+        """Record an arrival; routes not in the route table are ignored."""
+        idx = self._route_index.get(route)
+        if idx is None:
+            return
+        key = (station, direction != "N")
+        heap = self._heaps.get(key)
+        if heap is None:
+            heap = self._heaps[key] = ArrivalHeap(self.capacity)
+        heap.push(pack(epoch, idx, direction))
+
+    def update(self, other: "ArrivalStore") -> None:
+        """Merge another store built over the same route table."""
+        for key, heap in other._heaps.items():
+            mine = self._heaps.get(key)
+            if mine is None:
+                mine = self._heaps[key] = ArrivalHeap(self.capacity)
+            for record in heap.records():
+                mine.push(record)
+
+    def timeline(self) -> List[int]:
+        """All kept arrivals as packed records, earliest first."""
+        return list(heapq.merge(*(h.records() for h in self._heaps.values())))
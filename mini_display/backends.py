@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Output backends - things that frames can be presented on.
+
+Every backend exposes the subset of the rgbmatrix RGBMatrix API that the
+display loop uses (width, height, CreateFrameCanvas, SwapOnVSync, SetImage and
+Clear), so the loop and output stage run unchanged on a real panel or on an
+ordinary Linux box.
+"""
+
+import os
+import sys
+import time
+from typing import List
+
+from PIL import Image
+
+from mini_display.utils import clamp, load_numpy
+
+BACKENDS = ("rgbmatrix", "framebuffer", "image", "null")
+
+
+class ImageCanvas:
+    """Offscreen canvas backed by a PIL image."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.image = Image.new("RGB", (width, height))
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True) -> None:
+        """Copy an image onto the canvas."""
+        self.image.paste(image.convert("RGB"), (offset_x, offset_y))
+
+    def Clear(self) -> None:
+        """Fill the canvas with black."""
+        self.image.paste((0, 0, 0), (0, 0, self.width, self.height))
+
+
+class HeadlessMatrix:
+    """Base class for backends without a physical panel."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.frames = 0
+        self._front = ImageCanvas(width, height)
+
+    def CreateFrameCanvas(self) -> ImageCanvas:
+        """Create an offscreen canvas matching the display size."""
+        return ImageCanvas(self.width, self.height)
+
+    def SwapOnVSync(self, canvas: ImageCanvas, framerate_fraction: int = 1) -> ImageCanvas:
+        """Show a canvas and return the previous front canvas."""
+        previous, self._front = self._front, canvas
+        self.frames += 1
+        self._show(canvas.image)
+        return previous
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True) -> None:
+        """Draw an image directly onto the visible canvas."""
+        self._front.SetImage(image, offset_x, offset_y)
+        self.frames += 1
+        self._show(self._front.image)
+
+    def Clear(self) -> None:
+        """Blank the visible canvas."""
+        self._front.Clear()
+        self.frames += 1
+        self._show(self._front.image)
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+    def _show(self, image: Image.Image) -> None:
+        """Hook called with every frame that becomes visible."""
+        pass
+
+
+class NullMatrix(HeadlessMatrix):
+    """Discard every frame. Useful for load testing the render path."""
+
+    def SwapOnVSync(self, canvas: ImageCanvas, framerate_fraction: int = 1) -> ImageCanvas:
+        """Count the frame and hand the canvas straight back."""
+        self.frames += 1
+        return canvas
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True) -> None:
+        """Discard the image."""
+        pass
+
+    def Clear(self) -> None:
+        """Nothing to clear."""
+        pass
+
+
+class FramebufferMatrix(HeadlessMatrix):
+    """Keep the visible frame in a NumPy array of shape (height, width, 3)."""
+
+    def __init__(self, width: int, height: int):
+        np = load_numpy()
+        if np is None:
+            raise RuntimeError("The framebuffer backend requires numpy. Install with 'pip install numpy'.")
+        super().__init__(width, height)
+        self._np = np
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def _show(self, image: Image.Image) -> None:
+        """Copy the visible image into the framebuffer array."""
+        self.frame[...] = self._np.asarray(image)
+
+
+class ImageDumpMatrix(HeadlessMatrix):
+    """Write presented frames to disk.
+    
+    If path ends in ".gif" the frames are collected and written as one
+    animated GIF on close(), with each frame shown for as long as it was on
+    screen. Otherwise path is a directory that receives numbered PNG files.
+    """
+
+    def __init__(self, width: int, height: int, path: str):
+        super().__init__(width, height)
+        self.path = path
+        self._gif = path.lower().endswith(".gif")
+        self._gif_frames: List[Image.Image] = []
+        self._gif_times: List[float] = []
+        if not self._gif:
+            os.makedirs(path, exist_ok=True)
+
+    def _show(self, image: Image.Image) -> None:
+        """Save or collect the visible image."""
+        if self._gif:
+            self._gif_frames.append(image.copy())
+            self._gif_times.append(time.monotonic())
+        else:
+            image.save(os.path.join(self.path, f"frame-{self.frames:06d}.png"))
+
+    def close(self) -> None:
+        """Write the collected GIF, if any."""
+        if not self._gif or not self._gif_frames:
+            return
+        ends = self._gif_times[1:] + [time.monotonic()]
+        durations = [max(20, int((end - start) * 1000)) for start, end in zip(self._gif_times, ends)]
+        first, rest = self._gif_frames[0], self._gif_frames[1:]
+        first.save(self.path, save_all=True, append_images=rest, duration=durations, loop=0)
+        self._gif_frames = []
+        self._gif_times = []
+
+
+def create_rgbmatrix(args):
+    """Build the hardware RGBMatrix from command line arguments."""
+    try:
+        from rgbmatrix import RGBMatrix, RGBMatrixOptions
+    except Exception:
+        print("Error: rpi-rgb-led-matrix not available. Build and install the HZeller bindings.", file=sys.stderr)
+        raise
+    options = RGBMatrixOptions()
+    options.rows = args.rows
+    options.cols = args.cols
+    options.chain_length = args.chain_length
+    options.parallel = args.parallel
+    options.hardware_mapping = args.hardware_mapping
+    options.gpio_slowdown = args.gpio_slowdown
+    options.pwm_bits = args.pwm_bits
+    options.brightness = clamp(args.brightness, 1, 100)
+    return RGBMatrix(options=options)
+
+
+def create_backend(args):
+    """
+    Build the output backend selected by --backend.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        RGBMatrix or a headless matrix with the same interface
+    """
+    name = getattr(args, "backend", "rgbmatrix")
+    if name == "rgbmatrix":
+        return create_rgbmatrix(args)
+    width = args.cols * args.chain_length
+    height = args.rows * args.parallel
+    if name == "null":
+        return NullMatrix(width, height)
+    if name == "framebuffer":
+        return FramebufferMatrix(width, height)
+    if name == "image":
+        return ImageDumpMatrix(width, height, args.dump_path or "frames")
+    raise ValueError(f"Unknown backend: {name}, must be one of: {', '.join(BACKENDS)}")
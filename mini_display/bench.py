@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for plugin render and fetch-parse hot paths.
+
+Runs fully offline: fetches are answered from recorded fixtures (--fixtures)
+or from synthetic GTFS-RT and NWS responses. Results are written as JSON so
+runs can be compared across commits and across Pi models.
+
+Usage:
+    mini-display bench [--iterations N] [--output results.json]
+    python -m mini_display.bench
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import PIL
+
+from mini_display import __version__
+from mini_display.backends import NullMatrix
+from mini_display.compositor import Compositor, CompositorLoop, Region
+from mini_display.fixtures import FixtureStore, serve_fixtures, synthetic_fixtures
+from mini_display.frame_cache import FrameCache, ImagePool
+from mini_display.output import FrameOutput
+from mini_display.plugins import ClockPlugin, SubwayPlugin, WeatherPlugin
+from mini_display.transitions import TransitionEngine
+from mini_display.utils import load_numpy
+
+
+@dataclasses.dataclass
+class BenchResult:
+    """Timing, CPU and allocation figures for one benchmark."""
+    name: str
+    iterations: int
+    wall_ms: Dict[str, float]
+    cpu_ms_per_iter: float
+    alloc_peak_bytes: int
+    alloc_retained_bytes_per_iter: float
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def run_bench(name: str, fn: Callable[[], None], iterations: int, warmup: int = 3) -> BenchResult:
+    """
+    Measure a callable.
+
+    Timing and CPU are measured in one pass; allocations are measured in a
+    second pass under tracemalloc so its overhead does not skew the timings.
+
+    Args:
+        name: Benchmark name
+        fn: Callable to measure
+        iterations: Number of measured calls per pass
+        warmup: Unmeasured calls made first to fill caches
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    samples: List[float] = []
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    cpu_ms = (time.process_time() - cpu_start) * 1000.0 / iterations
+
+    gc.collect()
+    reset_peak = getattr(tracemalloc, "reset_peak", None)
+    tracemalloc.start()
+    try:
+        peak = 0
+        base, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            if reset_peak is not None:
+                reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, call_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, call_peak - before)
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        wall_ms={
+            "mean": statistics.mean(samples),
+            "median": statistics.median(samples),
+            "p95": _percentile(samples, 95),
+            "min": min(samples),
+            "max": max(samples),
+        },
+        cpu_ms_per_iter=cpu_ms,
+        alloc_peak_bytes=peak,
+        alloc_retained_bytes_per_iter=(end - base) / iterations,
+    )
+
+
+def _device_model() -> str:
+    """Board model (e.g. 'Raspberry Pi Zero 2 W Rev 1.0') if available."""
+    try:
+        with open("/proc/device-tree/model", "r") as fp:
+            return fp.read().strip("\x00\n ")
+    except Exception:
+        return platform.machine()
+
+
+def environment() -> Dict[str, str]:
+    """Metadata identifying where a run happened."""
+    return {
+        "mini_display": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "pillow": PIL.__version__,
+        "machine": platform.machine(),
+        "model": _device_model(),
+        "system": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_suite(
+    iterations: int = 200,
+    fetch_iterations: int = 20,
+    width: int = 64,
+    height: int = 32,
+    store: Optional[FixtureStore] = None,
+    only: Optional[List[str]] = None,
+) -> List[BenchResult]:
+    """
+    Run every benchmark and return the results.
+
+    Args:
+        iterations: Calls per render/loop benchmark
+        fetch_iterations: Calls per fetch-parse benchmark
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        store: Fixtures to answer fetches from (default: synthetic)
+        only: Substrings selecting which benchmarks to run
+    """
+    store = store if store is not None else synthetic_fixtures()
+    results: List[BenchResult] = []
+
+    def selected(name: str) -> bool:
+        return not only or any(s in name for s in only)
+
+    with serve_fixtures(store), tempfile.TemporaryDirectory(prefix="mini-display-bench-") as cache_dir:
+        clock = ClockPlugin()
+        subway = SubwayPlugin()
+        subway_nyct = SubwayPlugin(decoder="nyct")
+        weather = WeatherPlugin(cache_dir=cache_dir)
+        subway._fetch()
+        weather._fetch()
+        plugins = [clock, subway, weather]
+
+        benches: List[tuple] = [
+            ("fetch.subway", subway._fetch, fetch_iterations),
+            ("fetch.subway.nyct", subway_nyct._fetch, fetch_iterations),
+            ("fetch.weather", weather._fetch, fetch_iterations),
+            ("tick.weather", weather.tick, iterations),
+        ]
+        pool = ImagePool()
+        box = (0, 0, width, height)
+        for plugin in plugins:
+            benches.append((
+                f"render.{plugin.name}",
+                lambda p=plugin: p.render(width=width, height=height),
+                iterations,
+            ))
+            benches.append((
+                f"render_into.{plugin.name}",
+                lambda p=plugin: p.render_into(pool.acquire(width, height), box),
+                iterations,
+            ))
+
+        output = FrameOutput(NullMatrix(width, height))
+        frames = FrameCache()
+        state = {"idx": 0}
+
+        def loop_cycle(cached: bool) -> None:
+            plugin = plugins[state["idx"] % len(plugins)]
+            state["idx"] += 1
+            if cached:
+                img, key = frames.render(plugin, width, height)
+            else:
+                img, key = pool.acquire(width, height), None
+                plugin.render_into(img, box)
+            output.present(img, key)
+
+        benches.append(("loop.uncached", lambda: loop_cycle(False), iterations))
+        benches.append(("loop.cached", lambda: loop_cycle(True), iterations))
+
+        # A 2x2 wall of panels, every region redrawn each frame
+        regions = [
+            Region(x, y, width, height, [plugin])
+            for (x, y), plugin in zip(
+                [(0, 0), (width, 0), (0, height), (width, height)], [clock, subway, weather, clock]
+            )
+        ]
+        wall = CompositorLoop(
+            Compositor(2 * width, 2 * height, regions), FrameOutput(NullMatrix(2 * width, 2 * height))
+        )
+        benches.append(("composite.panels", lambda: wall.draw(regions), iterations))
+
+        if load_numpy() is not None:
+            src = clock.render(width=width, height=height)
+            dst = subway.render(width=width, height=height)
+            for kind in ("crossfade", "slide"):
+                engine = TransitionEngine(width, height, kind=kind)
+                engine.load(src, dst)
+                benches.append((f"transition.{kind}", lambda e=engine: e.blend(0.5), iterations))
+
+        for name, fn, n in benches:
+            if selected(name):
+                results.append(run_bench(name, fn, n))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    p = argparse.ArgumentParser(prog="mini-display bench", description="Offline benchmarks for mini display hot paths.")
+    p.add_argument("--iterations", type=int, default=200, help="Calls per render/loop benchmark (default: 200)")
+    p.add_argument("--fetch-iterations", type=int, default=20, help="Calls per fetch benchmark (default: 20)")
+    p.add_argument("--rows", type=int, default=32, help="Canvas height in pixels (default: 32)")
+    p.add_argument("--cols", type=int, default=64, help="Canvas width in pixels (default: 64)")
+    p.add_argument("--fixtures", type=str, default=None, help="Recorded fixture directory (default: synthetic)")
+    p.add_argument("--only", action="append", help="Run only benchmarks whose name contains this. Repeatable.")
+    p.add_argument("--output", type=str, default=None, help="Write JSON results to this file (default: stdout)")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Benchmark entry point."""
+    args = parse_args(argv)
+    store = FixtureStore.load(args.fixtures) if args.fixtures else None
+    results = run_suite(
+        iterations=max(1, args.iterations),
+        fetch_iterations=max(1, args.fetch_iterations),
+        width=args.cols,
+        height=args.rows,
+        store=store,
+        only=args.only,
+    )
+    report = {
+        "environment": environment(),
+        "fixtures": args.fixtures or "synthetic",
+        "results": [dataclasses.asdict(r) for r in results],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(text + "\n")
+    else:
+        print(text)
+    for r in results:
+        print(
+            f"{r.name:16s} median {r.wall_ms['median']:8.3f} ms  p95 {r.wall_ms['p95']:8.3f} ms  "
+            f"cpu {r.cpu_ms_per_iter:8.3f} ms  peak {r.alloc_peak_bytes:>9d} B",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Region compositor - show several plugins at once on a large canvas.
+
+The canvas (e.g. a 128x64 wall of chained and parallel panels) is split into
+regions, each with its own plugin rotation. A region is redrawn only when its
+own plugin changes, its slot ends or its scheduled change time arrives, and
+never more often than its minimum interval, so every region refreshes at its
+own rate. Dirty regions are drawn concurrently into one preallocated
+full-canvas image, which is then presented as a single frame; no full-canvas
+image is allocated per frame.
+
+Rotating regions tell the fetch scheduler when each of their plugins next
+goes on screen, as the single-plugin display loop does; plugins with a region
+to themselves are always on screen and refresh on their own interval.
+"""
+
+import dataclasses
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from mini_display.frame_cache import FrameCache
+from mini_display.metrics import DEADLINE_MISSES, PLUGIN_ERRORS, RENDER_SECONDS, TICK_SECONDS
+from mini_display.output import FrameOutput
+from mini_display.plugin_base import Plugin, uses_render_into
+from mini_display.scheduler import FetchScheduler, QuietHours
+
+_REGION_RE = re.compile(
+    r"^(?P<names>[\w.+-]+)@(?P<x>\d+),(?P<y>\d+),(?P<w>\d+)x(?P<h>\d+)"
+    r"(?:/(?P<cycle>[\d.]+)(?:/(?P<interval>[\d.]+))?)?$"
+)
+
+
+@dataclasses.dataclass
+class RegionSpec:
+    """Parsed description of a region, before its plugins are created."""
+    names: List[str]
+    x: int
+    y: int
+    width: int
+    height: int
+    cycle_seconds: float = 6
+    min_interval: float = 0.0
+
+
+def parse_region(spec: str) -> RegionSpec:
+    """
+    Parse a region spec of the form NAMES@X,Y,WxH[/CYCLE[/MIN_INTERVAL]].
+
+    NAMES is one or more plugin names joined with "+", rotated every CYCLE
+    seconds; MIN_INTERVAL caps how often the region is redrawn.
+    Example: "subway+weather@64,0,64x32/10".
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    m = _REGION_RE.match(spec.strip())
+    if m is None:
+        raise ValueError(f"Invalid region: {spec!r}, expected NAMES@X,Y,WxH[/CYCLE[/MIN_INTERVAL]]")
+    return RegionSpec(
+        names=[n for n in m.group("names").split("+") if n],
+        x=int(m.group("x")),
+        y=int(m.group("y")),
+        width=int(m.group("w")),
+        height=int(m.group("h")),
+        cycle_seconds=float(m.group("cycle") or 6),
+        min_interval=float(m.group("interval") or 0),
+    )
+
+
+def panel_layout(
+    width: int, height: int, panel_width: int, panel_height: int, names: Sequence[str], cycle_seconds: float = 6
+) -> List[RegionSpec]:
+    """
+    One region per physical panel, with the plugins dealt out across them.
+
+    With fewer panels than plugins, panels rotate through several plugins;
+    with more, plugins are repeated.
+    """
+    cells = [
+        (x, y)
+        for y in range(0, height - panel_height + 1, panel_height)
+        for x in range(0, width - panel_width + 1, panel_width)
+    ]
+    if not cells or not names:
+        return []
+    specs = []
+    for i, (x, y) in enumerate(cells):
+        assigned = list(names[i::len(cells)]) or [names[i % len(names)]]
+        specs.append(RegionSpec(assigned, x, y, panel_width, panel_height, cycle_seconds))
+    return specs
+
+
+class Region:
+    """A rectangle of the canvas showing its own plugin rotation."""
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        plugins: List[Plugin],
+        cycle_seconds: float = 6,
+        min_interval: float = 0.0,
+    ):
+        """
+        Args:
+            x: Left edge on the canvas
+            y: Top edge on the canvas
+            width: Region width in pixels
+            height: Region height in pixels
+            plugins: Plugins rotated through in this region
+            cycle_seconds: Seconds each plugin stays up (if more than one)
+            min_interval: Minimum seconds between redraws of this region
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.plugins = plugins
+        self.cycle_seconds = max(2.0, float(cycle_seconds))
+        self.min_interval = max(0.0, float(min_interval))
+        self.index = 0
+        self.dirty = True
+        self.key: Optional[Hashable] = None
+        self.slot_end = 0.0
+        self.change_at = float("inf")
+        self.next_draw = 0.0
+
+    @property
+    def plugin(self) -> Plugin:
+        """Plugin currently shown in this region."""
+        return self.plugins[self.index % len(self.plugins)]
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        """(left, top, right, bottom) on the canvas."""
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+
+class Compositor:
+    """Pastes region frames into one preallocated canvas image."""
+
+    def __init__(self, width: int, height: int, regions: List[Region], bg: Tuple[int, int, int] = (0, 0, 0)):
+        """
+        Args:
+            width: Canvas width in pixels
+            height: Canvas height in pixels
+            regions: Regions to composite; must lie within the canvas
+            bg: Colour of canvas areas not covered by a region
+
+        Raises:
+            ValueError: If a region lies outside the canvas
+        """
+        for r in regions:
+            if r.x < 0 or r.y < 0 or r.x + r.width > width or r.y + r.height > height:
+                raise ValueError(f"Region {r.box} does not fit a {width}x{height} canvas")
+        self.width = width
+        self.height = height
+        self.regions = regions
+        self.image = Image.new("RGB", (width, height), bg)
+
+    def blit(self, region: Region, img: Image.Image) -> None:
+        """Copy a region's frame into its rectangle of the canvas."""
+        if img.size != (region.width, region.height):
+            img = img.crop((0, 0, region.width, region.height))
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        self.image.paste(img, (region.x, region.y))
+
+
+class CompositorLoop:
+    """Redraws regions independently and presents the composited canvas."""
+
+    def __init__(
+        self,
+        compositor: Compositor,
+        output: FrameOutput,
+        frames: Optional[FrameCache] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        quiet_hours: Optional[QuietHours] = None,
+    ):
+        """
+        Args:
+            compositor: Canvas and regions to draw
+            output: Output stage to present frames on
+            frames: Frame cache (default: a new one sized for the regions)
+            scheduler: Background fetch scheduler; plugins it does not
+                handle are ticked on the loop thread before drawing
+            quiet_hours: Daily window during which the panel is blank
+        """
+        self.compositor = compositor
+        self.regions = compositor.regions
+        self.output = output
+        self.frames = frames or FrameCache(maxsize=max(32, 4 * sum(len(r.plugins) for r in self.regions)))
+        self.scheduler = scheduler
+        self.quiet_hours = quiet_hours
+        # Draw due regions on pool threads; the profiler turns this off so
+        # all drawing happens on the thread it is watching
+        self.concurrent = True
+        self.plugins: List[Plugin] = []
+        for r in self.regions:
+            for p in r.plugins:
+                if p not in self.plugins:
+                    self.plugins.append(p)
+        # Plugins with a region to themselves are never rotated off screen
+        self._always_shown = [r.plugins[0] for r in self.regions if len(r.plugins) == 1]
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.regions)), thread_name_prefix="mini-display-region"
+        )
+        for plugin in self.plugins:
+            plugin.set_change_listener(self._on_changed)
+
+    def stop(self) -> None:
+        """Stop the loop. Safe to call from signal handlers and other threads."""
+        self.stop_event.set()
+        self._wake.set()
+
+    def _on_changed(self, plugin: Plugin) -> None:
+        """Mark regions showing the plugin dirty and wake the loop."""
+        for r in self.regions:
+            if r.plugin is plugin:
+                r.dirty = True
+                self._wake.set()
+
+    def _draw_region(self, region: Region) -> Optional[Hashable]:
+        """Tick (if unscheduled) and draw a region's current plugin onto the canvas.
+
+        Plugins without a state key that implement render_into() draw
+        straight into their region of the canvas; others go through the
+        frame cache and are pasted in.
+
+        Returns:
+            The region's frame key (None if uncached)
+        """
+        plugin = region.plugin
+        if self.scheduler is None or not self.scheduler.handles(plugin):
+            try:
+                with TICK_SECONDS.labels(plugin.name).time():
+                    plugin.tick()
+            except Exception:
+                PLUGIN_ERRORS.labels(plugin.name, "tick").inc()
+        try:
+            if plugin.state_key() is None and uses_render_into(plugin):
+                with RENDER_SECONDS.labels(plugin.name).time():
+                    plugin.render_into(self.compositor.image, region.box)
+                return None
+            img, key = self.frames.render(plugin, region.width, region.height)
+            self.compositor.blit(region, img)
+            return key
+        except Exception:
+            PLUGIN_ERRORS.labels(plugin.name, "render").inc()
+            self.compositor.image.paste((80, 0, 0), region.box)
+            return None
+
+    def _plan(self, region: Region) -> None:
+        """Tell the scheduler when the region's plugins next go on screen."""
+        if self.scheduler is not None and len(region.plugins) > 1:
+            self.scheduler.plan_rotation(
+                region.plugins, region.index, region.slot_end, region.cycle_seconds, exclude=self._always_shown
+            )
+
+    def _sleep_quiet(self) -> bool:
+        """Blank the panel until quiet hours end, if they have begun.
+
+        Returns:
+            True if the loop slept
+        """
+        if self.quiet_hours is None:
+            return False
+        remaining = self.quiet_hours.remaining()
+        if remaining <= 0:
+            return False
+        self.output.clear()
+        resume = time.monotonic() + remaining
+        for r in self.regions:
+            # Each region resumes with the plugin it would show next
+            r.slot_end = resume
+            self._plan(r)
+        self.stop_event.wait(remaining)
+        now = time.monotonic()
+        for r in self.regions:
+            r.index += 1
+            r.dirty = True
+            r.slot_end = now + r.cycle_seconds
+            self._plan(r)
+        return True
+
+    def draw(self, regions: List[Region]) -> None:
+        """Draw the given regions (concurrently if enabled), then present the canvas."""
+        if len(regions) == 1 or not self.concurrent:
+            keys = [self._draw_region(r) for r in regions]
+        else:
+            keys = list(self._executor.map(self._draw_region, regions))
+        now = time.monotonic()
+        for region, key in zip(regions, keys):
+            region.key = key
+            region.next_draw = now + region.min_interval
+            change_in = region.plugin.seconds_until_change()
+            region.change_at = now + max(0.01, change_in) if change_in is not None else float("inf")
+        keys = tuple(r.key for r in self.regions)
+        self.output.present(self.compositor.image, None if None in keys else keys)
+
+    def run(self, max_slots: Optional[int] = None) -> None:
+        """
+        Run until stop() is called.
+
+        Args:
+            max_slots: Also stop after this many plugin slots, counted
+                across all regions
+        """
+        if not self.regions:
+            return
+        try:
+            now = time.monotonic()
+            for r in self.regions:
+                r.slot_end = now + r.cycle_seconds
+                self._plan(r)
+            slots = len(self.regions)
+            while not self.stop_event.is_set() and (max_slots is None or slots <= max_slots):
+                if self._sleep_quiet():
+                    continue
+                now = time.monotonic()
+                due: List[Region] = []
+                deadline = float("inf")
+                for r in self.regions:
+                    if now >= r.slot_end:
+                        if len(r.plugins) > 1:
+                            r.index += 1
+                            r.dirty = True
+                        slots += 1
+                        r.slot_end += r.cycle_seconds
+                        if r.slot_end <= now:
+                            DEADLINE_MISSES.labels("slot").inc()
+                            r.slot_end = now + r.cycle_seconds
+                        self._plan(r)
+                    if now >= r.change_at:
+                        r.dirty = True
+                    if r.dirty and now >= r.next_draw:
+                        r.dirty = False
+                        due.append(r)
+                    deadline = min(deadline, r.slot_end, r.change_at)
+                    if r.dirty:
+                        deadline = min(deadline, r.next_draw)
+                if due:
+                    self.draw(due)
+                    continue
+                self._wake.wait(max(0.0, deadline - time.monotonic()))
+                self._wake.clear()
+        finally:
+            self._executor.shutdown(wait=False)
@@ -6,37 +6,28 @@ Main application logic for cycling through plugins on an LED matrix display.
 """
 
 import argparse
+import contextlib
+import os
 import signal
 import sys
-import threading
-import time
-from typing import List
-
-from PIL import Image, ImageDraw, ImageFont
-
-try:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions
-except Exception as e:
-    print("Error: rpi-rgb-led-matrix not available. Build and install the HZeller bindings.", file=sys.stderr)
-    raise
+from typing import Dict, List, Optional
 
+from mini_display.backends import BACKENDS, create_backend
+from mini_display.compositor import Compositor, CompositorLoop, Region, panel_layout, parse_region
+from mini_display.loop import DisplayLoop
+from mini_display.metrics import MetricsServer, TextfileWriter, watch_cache
+from mini_display.output import FrameOutput
 from mini_display.plugin_base import Plugin
 from mini_display.plugin_adapter import PluginAdapter
-from mini_display.utils import draw_text, clamp
+from mini_display.scheduler import FetchScheduler, parse_quiet_hours
+from mini_display.transitions import TRANSITIONS, TransitionEngine
+from mini_display.utils import metrics_cache
+from mini_display.workers import ProcessPlugin
 
 
-def build_matrix_from_args(args) -> RGBMatrix:
-    """Build RGB matrix from command line arguments."""
-    options = RGBMatrixOptions()
-    options.rows = args.rows
-    options.cols = args.cols
-    options.chain_length = args.chain_length
-    options.parallel = args.parallel
-    options.hardware_mapping = args.hardware_mapping
-    options.gpio_slowdown = args.gpio_slowdown
-    options.pwm_bits = args.pwm_bits
-    options.brightness = clamp(args.brightness, 1, 100)
-    return RGBMatrix(options=options)
+def build_matrix_from_args(args):
+    """Build the output matrix (hardware or headless) from command line arguments."""
+    return create_backend(args)
 
 
 def parse_args() -> argparse.Namespace:
@@ -50,7 +41,26 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--gpio-slowdown", type=int, default=2, help="GPIO slowdown (default: 2)")
     p.add_argument("--pwm-bits", type=int, default=11, help="PWM bits (default: 11)")
     p.add_argument("--brightness", type=int, default=70, help="Brightness 1-100 (default: 70)")
+    p.add_argument("--backend", choices=BACKENDS, default="rgbmatrix", help="Output backend (default: rgbmatrix)")
+    p.add_argument("--dump-path", type=str, default=None, help="Image backend: PNG directory or .gif file (default: frames)")
     p.add_argument("--cycle-seconds", type=int, default=6, help="Seconds per widget (default: 6)")
+    p.add_argument("--transition", choices=TRANSITIONS, default="cut", help="Transition between widgets (default: cut)")
+    p.add_argument("--transition-ms", type=int, default=400, help="Transition length in milliseconds (default: 400)")
+    p.add_argument("--fps", type=int, default=30, help="Transition frame rate, 1-60 (default: 30)")
+    p.add_argument("--layout", choices=("single", "panels"), default="single", help="single: one plugin on the whole canvas; panels: one region per panel (default: single)")
+    p.add_argument("--region", action="append", type=parse_region, metavar="NAMES@X,Y,WxH[/CYCLE[/MIN_INTERVAL]]", help="Show plugins (joined with +) in a canvas region. Repeat for multiple; overrides --layout")
+    p.add_argument("--quiet-hours", type=parse_quiet_hours, default=None, metavar="HH:MM-HH:MM", help="Blank the panel and pause fetching daily in this local-time window (default: off)")
+    p.add_argument("--isolate", action="store_true", help="Run each plugin in its own worker process")
+    p.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port (default: off)")
+    p.add_argument("--metrics-host", type=str, default="127.0.0.1", help="Address for the metrics endpoint (default: 127.0.0.1)")
+    p.add_argument("--metrics-textfile", type=str, default=None, help="Periodically write Prometheus metrics to this file (default: off)")
+    p.add_argument("--metrics-interval", type=float, default=15.0, help="Seconds between metrics textfile writes (default: 15)")
+    p.add_argument("--profile", type=str, default=None, metavar="FILE", help="Profile the display loop and write pstats to FILE, then exit")
+    p.add_argument("--profile-cycles", type=int, default=3, help="Plugin rotations to profile (default: 3)")
+    p.add_argument("--profile-seconds", type=float, default=None, help="Profile for this many seconds instead of a number of rotations")
+    p.add_argument("--serve", type=str, default=None, metavar="[HOST:]PORT", help="Also stream frames to --connect panels on this address (default host: all interfaces)")
+    p.add_argument("--connect", type=str, default=None, metavar="HOST:PORT", help="Show frames streamed from a --serve process instead of running plugins")
+    p.add_argument("--upstream", type=str, default=None, metavar="URL", help="Send all upstream requests to a local stand-in (see 'mini-display replay')")
     p.add_argument("--station", action="append", help="Station name filter. Repeat for multiple. Default Jay St-MetroTech.")
     p.add_argument("--routes", type=str, default="A,C,F,R", help="Comma-separated route letters to consider.")
     p.add_argument("--zip", type=str, default="11201")
@@ -59,15 +69,72 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+def run_client(args: argparse.Namespace, matrix) -> None:
+    """Show frames from a --serve process; no plugins run in this mode."""
+    from mini_display.frame_server import FrameClient, parse_address
+
+    output = FrameOutput(matrix)
+    host, port = parse_address(args.connect, default_host="127.0.0.1")
+    client = FrameClient(host, port, output)
+
+    def handle_sig(signum, frame):
+        client.stop()
+
+    signal.signal(signal.SIGINT, handle_sig)
+    signal.signal(signal.SIGTERM, handle_sig)
+
+    exporters = []
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(args.metrics_port, host=args.metrics_host))
+    if args.metrics_textfile:
+        exporters.append(TextfileWriter(args.metrics_textfile, interval=args.metrics_interval))
+    for exporter in exporters:
+        exporter.start()
+    try:
+        client.run()
+    finally:
+        for exporter in exporters:
+            exporter.stop()
+        try:
+            output.clear()
+        except Exception:
+            pass
+        output.close()
+
+
 def main():
     """Main application entry point."""
+    if sys.argv[1:2] == ["bench"]:
+        from mini_display.bench import main as bench_main
+        return bench_main(sys.argv[2:])
+    if sys.argv[1:2] in (["record"], ["replay"]):
+        from mini_display.replay import main as replay_main
+        return replay_main(sys.argv[1:])
+
     args = parse_args()
+    upstream = contextlib.nullcontext()
+    if args.upstream:
+        from mini_display.fixtures import UPSTREAM_ENV, redirect_upstream
+        # Worker processes inherit the redirect through the environment
+        os.environ[UPSTREAM_ENV] = args.upstream
+        upstream = redirect_upstream(args.upstream)
 
     stations = args.station if args.station else None
     route_groups = [r.strip().upper() for r in args.routes.split(",") if r.strip()]
 
+    matrix = build_matrix_from_args(args)
+    if args.connect:
+        return run_client(args, matrix)
+
+    frame_server = None
+    if args.serve:
+        from mini_display.frame_server import FrameServer, parse_address
+        host, port = parse_address(args.serve)
+        frame_server = FrameServer(matrix.width, matrix.height, port, host=host)
+    output = FrameOutput(matrix, mirror=frame_server)
+
     # Use the plugin adapter to create default plugins
-    plugins: List[Plugin] = PluginAdapter.create_default_plugins(
+    specs = PluginAdapter.default_plugin_specs(
         tz=None,
         zip_code=args.zip,
         lat=args.lat,
@@ -75,46 +142,116 @@ def main():
         stations=stations,
         route_groups=route_groups,
     )
+    plugin_kwargs = dict(specs)
+    instances: Dict[tuple, Plugin] = {}
+    workers: List[ProcessPlugin] = []
 
-    matrix = build_matrix_from_args(args)
-    stop_event = threading.Event()
+    def make_plugin(name: str, width: int, height: int) -> Optional[Plugin]:
+        """Create a plugin, shared by every region showing it at this size."""
+        key = (name, width, height) if args.isolate else (name,)
+        if key not in instances:
+            kwargs = plugin_kwargs.get(name, {})
+            if args.isolate:
+                # The plugin ticks and renders in its own process; this
+                # process only presents the frames it hands back
+                worker = ProcessPlugin(name, kwargs, width, height)
+                worker.start()
+                workers.append(worker)
+                instances[key] = worker
+            else:
+                plugin = PluginAdapter.create_plugin(name, **kwargs)
+                if plugin is None:
+                    return None
+                instances[key] = plugin
+        return instances[key]
+
+    region_specs = args.region or []
+    if not region_specs and args.layout == "panels":
+        region_specs = panel_layout(
+            output.width, output.height, args.cols, args.rows, [name for name, _ in specs], args.cycle_seconds
+        )
+
+    regions: List[Region] = []
+    for spec in region_specs:
+        region_plugins = [p for p in (make_plugin(n, spec.width, spec.height) for n in spec.names) if p]
+        if region_plugins:
+            regions.append(Region(
+                spec.x, spec.y, spec.width, spec.height, region_plugins,
+                cycle_seconds=spec.cycle_seconds, min_interval=spec.min_interval,
+            ))
+    if not regions:
+        for name, _ in specs:
+            make_plugin(name, output.width, output.height)
+    plugins: List[Plugin] = list(instances.values())
+
+    # Network refreshes run in the background so render never waits on them.
+    # When profiling, everything runs on the profiled loop thread instead.
+    scheduler = None if args.profile else FetchScheduler(plugins, quiet_hours=args.quiet_hours)
+
+    if regions:
+        loop = CompositorLoop(
+            Compositor(output.width, output.height, regions),
+            output,
+            scheduler=scheduler,
+            quiet_hours=args.quiet_hours,
+        )
+    else:
+        loop = DisplayLoop(
+            plugins,
+            output,
+            cycle_seconds=args.cycle_seconds,
+            transition=TransitionEngine(
+                output.width,
+                output.height,
+                kind=args.transition,
+                duration=args.transition_ms / 1000.0,
+                fps=args.fps,
+            ),
+            scheduler=scheduler,
+            quiet_hours=args.quiet_hours,
+        )
+
+    watch_cache("frames", loop.frames)
+    watch_cache("text_metrics", metrics_cache())
+    exporters = []
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(args.metrics_port, host=args.metrics_host))
+    if args.metrics_textfile:
+        exporters.append(TextfileWriter(args.metrics_textfile, interval=args.metrics_interval))
 
     def handle_sig(signum, frame):
-        stop_event.set()
+        loop.stop()
 
     signal.signal(signal.SIGINT, handle_sig)
     signal.signal(signal.SIGTERM, handle_sig)
 
-    idx = 0
+    for exporter in exporters:
+        exporter.start()
+    if frame_server is not None:
+        frame_server.start()
     try:
-        while not stop_event.is_set():
-            plugin = plugins[idx % len(plugins)]
-            try:
-                plugin.tick()
-            except Exception:
-                pass
-
-            try:
-                img = plugin.render(width=matrix.width, height=matrix.height)
-                matrix.SetImage(img, 0, 0)
-            except Exception:
-                err = Image.new("RGB", (matrix.width, matrix.height), (80, 0, 0))
-                d = ImageDraw.Draw(err)
-                font = ImageFont.load_default()
-                draw_text(d, 1, 5, f"{plugin.name} err", (255, 255, 255), font)
-                matrix.SetImage(err, 0, 0)
-
-            end_at = time.time() + max(2, args.cycle_seconds)
-            while time.time() < end_at and not stop_event.is_set():
-                time.sleep(0.1)
-
-            idx += 1
+        with upstream:
+            if scheduler is not None:
+                scheduler.start()
+            if args.profile:
+                from mini_display.profiling import profile_loop
+                print(profile_loop(loop, args.profile, cycles=args.profile_cycles, seconds=args.profile_seconds))
+            else:
+                loop.run()
     finally:
+        if scheduler is not None:
+            scheduler.stop()
+        for worker in workers:
+            worker.close()
+        for exporter in exporters:
+            exporter.stop()
         try:
-            matrix.Clear()
+            output.clear()
         except Exception:
             pass
-
+        if frame_server is not None:
+            frame_server.stop()
+        output.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+HTTP fixtures - recorded or synthetic upstream responses for offline runs.
+
+A FixtureStore maps request URLs to canned responses (status, headers and
+body). Stores are saved as a directory holding an index.json plus one body
+file per response. serve_fixtures() answers every HTTP request made through
+`requests` (including NYCTFeed's feed downloads) from a store, so benchmarks
+and soak runs never touch the network; record_fixtures() captures live
+responses into a store, and redirect_upstream() sends all requests to a
+local stand-in server instead (see mini_display.replay).
+"""
+
+import contextlib
+import csv
+import dataclasses
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+INDEX_FILE = "index.json"
+
+# Environment variable holding the stand-in base URL, so worker processes
+# inherit the redirect
+UPSTREAM_ENV = "MINI_DISPLAY_UPSTREAM"
+
+# Response headers that describe the transfer rather than the body
+_HOP_HEADERS = {"connection", "content-encoding", "content-length", "keep-alive", "transfer-encoding"}
+
+
+@dataclasses.dataclass
+class Fixture:
+    """A single canned HTTP response."""
+    url: str
+    body: bytes
+    status: int = 200
+    headers: Dict[str, str] = dataclasses.field(default_factory=dict)
+    # Wall-clock time the response was captured (None for synthetic ones)
+    recorded_at: Optional[float] = None
+
+
+class FixtureStore:
+    """URL-keyed collection of canned HTTP responses."""
+
+    def __init__(self, fixtures: Optional[List[Fixture]] = None):
+        self._fixtures: Dict[str, Fixture] = {}
+        for fx in fixtures or []:
+            self.add(fx)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        """Normalize a URL for lookup (drop the fragment)."""
+        parts = urlsplit(url)
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+
+    def add(self, fixture: Fixture) -> None:
+        """Add or replace the response for a URL."""
+        self._fixtures[self._key(fixture.url)] = fixture
+
+    def get(self, url: str) -> Optional[Fixture]:
+        """Find the response for a URL, ignoring the query string if needed."""
+        key = self._key(url)
+        fx = self._fixtures.get(key)
+        if fx is None:
+            parts = urlsplit(key)
+            fx = self._fixtures.get(urlunsplit((parts.scheme, parts.netloc, parts.path, "", "")))
+        return fx
+
+    def urls(self) -> List[str]:
+        """All URLs with a stored response."""
+        return [fx.url for fx in self._fixtures.values()]
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+    @classmethod
+    def load(cls, path: str) -> "FixtureStore":
+        """Load a store saved with save()."""
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as fp:
+            index = json.load(fp)
+        store = cls()
+        for url, entry in index["responses"].items():
+            with open(os.path.join(path, entry["file"]), "rb") as body:
+                store.add(Fixture(
+                    url=url,
+                    body=body.read(),
+                    status=entry["status"],
+                    headers=entry["headers"],
+                    recorded_at=entry.get("recorded_at"),
+                ))
+        return store
+
+    def save(self, path: str) -> None:
+        """Write the store as a directory of body files plus index.json."""
+        os.makedirs(path, exist_ok=True)
+        responses = {}
+        for fx in self._fixtures.values():
+            name = hashlib.sha1(fx.url.encode("utf-8")).hexdigest()[:16] + ".body"
+            with open(os.path.join(path, name), "wb") as body:
+                body.write(fx.body)
+            responses[fx.url] = {"file": name, "status": fx.status, "headers": fx.headers}
+            if fx.recorded_at is not None:
+                responses[fx.url]["recorded_at"] = fx.recorded_at
+        with open(os.path.join(path, INDEX_FILE), "w", encoding="utf-8") as fp:
+            json.dump({"version": 1, "responses": responses}, fp, indent=2, sort_keys=True)
+
+
+def build_response(request: requests.PreparedRequest, fixture: Fixture) -> requests.Response:
+    """Turn a fixture into a requests.Response for the given request."""
+    resp = requests.Response()
+    resp.status_code = fixture.status
+    resp.reason = "OK" if fixture.status < 400 else "Error"
+    resp.headers = CaseInsensitiveDict(fixture.headers)
+    resp._content = fixture.body
+    resp.url = request.url
+    resp.request = request
+    resp.encoding = "utf-8"
+    return resp
+
+
+@contextlib.contextmanager
+def serve_fixtures(store: FixtureStore) -> Iterator[FixtureStore]:
+    """
+    Answer all `requests` traffic from a fixture store while active.
+
+    Requests for URLs without a fixture fail with ConnectionError, as they
+    would when offline. Conditional requests matching a fixture's ETag are
+    answered with 304 Not Modified.
+    """
+    original = requests.adapters.HTTPAdapter.send
+
+    def send(adapter, request, *args, **kwargs):
+        fx = store.get(request.url)
+        if fx is None:
+            raise requests.ConnectionError(f"No fixture for {request.url}", request=request)
+        etag = CaseInsensitiveDict(fx.headers).get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            fx = Fixture(url=fx.url, body=b"", status=304, headers=fx.headers)
+        return build_response(request, fx)
+
+    requests.adapters.HTTPAdapter.send = send
+    try:
+        yield store
+    finally:
+        requests.adapters.HTTPAdapter.send = original
+
+
+@contextlib.contextmanager
+def record_fixtures(store: FixtureStore) -> Iterator[FixtureStore]:
+    """
+    Capture every `requests` response into a fixture store while active.
+
+    Requests still go to the network. 304 responses carry no body and are
+    not recorded, so record with an empty HTTP cache.
+    """
+    original = requests.adapters.HTTPAdapter.send
+
+    def send(adapter, request, *args, **kwargs):
+        url = request.url
+        resp = original(adapter, request, *args, **kwargs)
+        if resp.status_code != 304:
+            headers = {k: v for k, v in resp.headers.items() if k.lower() not in _HOP_HEADERS}
+            store.add(Fixture(
+                url=url,
+                body=resp.content,
+                status=resp.status_code,
+                headers=headers,
+                recorded_at=time.time(),
+            ))
+        return resp
+
+    requests.adapters.HTTPAdapter.send = send
+    try:
+        yield store
+    finally:
+        requests.adapters.HTTPAdapter.send = original
+
+
+def upstream_url(base: str, url: str) -> str:
+    """Map https://HOST/PATH?QUERY to BASE/HOST/PATH?QUERY on a stand-in server."""
+    parts = urlsplit(url)
+    return urlunsplit(urlsplit(base.rstrip("/") + "/" + parts.netloc + parts.path)[:3] + (parts.query, ""))
+
+
+@contextlib.contextmanager
+def redirect_upstream(base: str) -> Iterator[str]:
+    """
+    Send all `requests` traffic to a stand-in server while active.
+
+    URLs are rewritten as the request is sent, so caches, validators and
+    persisted lookups still see the original upstream URLs.
+    """
+    original = requests.adapters.HTTPAdapter.send
+    prefix = base.rstrip("/") + "/"
+
+    def send(adapter, request, *args, **kwargs):
+        if not request.url.startswith(prefix):
+            request.url = upstream_url(base, request.url)
+        return original(adapter, request, *args, **kwargs)
+
+    requests.adapters.HTTPAdapter.send = send
+    try:
+        yield base
+    finally:
+        requests.adapters.HTTPAdapter.send = original
+
+
+# --- Synthetic fixtures -----------------------------------------------------
+
+NWS_POINT = (40.6944, -73.9918)
+NWS_FORECAST_URL = "https://api.weather.gov/gridpoints/OKX/33,34/forecast"
+NWS_HOURLY_URL = "https://api.weather.gov/gridpoints/OKX/33,34/forecast/hourly"
+
+
+def _platform_stops() -> Dict[str, List[str]]:
+    """Platform stop IDs from the static GTFS data, grouped by direction."""
+    import nyct_gtfs
+    path = os.path.join(os.path.dirname(nyct_gtfs.__file__), "gtfs_static", "stops.txt")
+    stops: Dict[str, List[str]] = {"N": [], "S": []}
+    with open(path, newline="", encoding="utf-8") as fp:
+        for row in csv.DictReader(fp):
+            if row.get("location_type") == "0" and row["stop_id"][-1:] in stops:
+                stops[row["stop_id"][-1]].append(row["stop_id"])
+    return stops
+
+
+def synthetic_gtfs_feed(
+    routes: List[str],
+    watch_stops: List[str],
+    now: Optional[float] = None,
+    trips_per_route: int = 60,
+    stops_per_trip: int = 30,
+    seed: int = 0,
+) -> bytes:
+    """
+    Build a serialized NYCT GTFS-RT FeedMessage with realistic shape.
+
+    Args:
+        routes: Route IDs carried by the feed
+        watch_stops: Parent stop IDs that every trip passes through, so the
+            configured stations always have arrivals
+        now: Feed timestamp (default: current time)
+        trips_per_route: Trip updates generated per route and direction
+        stops_per_trip: Stop time updates per trip
+        seed: Random seed, for reproducible fixtures
+    """
+    from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2, nyct_subway_pb2
+
+    rnd = random.Random(seed)
+    now = int(now if now is not None else time.time())
+    platforms = _platform_stops()
+
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "1.0"
+    feed.header.timestamp = now
+    feed.header.Extensions[nyct_subway_pb2.nyct_feed_header].nyct_subway_version = "1.0"
+
+    n = 0
+    for route in routes:
+        for direction in ("N", "S"):
+            for i in range(trips_per_route):
+                n += 1
+                start = now - rnd.randint(0, 3600)
+                trip_id = f"{(start % 86400) * 100 // 60:06d}_{route}..{direction}{rnd.randint(1, 99):02d}R"
+                entity = feed.entity.add()
+                entity.id = str(n)
+                tu = entity.trip_update
+                tu.trip.trip_id = trip_id
+                tu.trip.route_id = route
+                tu.trip.start_date = time.strftime("%Y%m%d", time.localtime(start))
+                desc = tu.trip.Extensions[nyct_subway_pb2.nyct_trip_descriptor]
+                desc.train_id = f"0{route} {i:04d}+ ORG/DST"
+                desc.is_assigned = True
+                stop_ids = rnd.sample(platforms[direction], stops_per_trip)
+                watch_at = rnd.randrange(stops_per_trip)
+                if watch_stops:
+                    stop_ids[watch_at] = rnd.choice(watch_stops) + direction
+                t = now + rnd.randint(0, 120)
+                for stop_id in stop_ids:
+                    stu = tu.stop_time_update.add()
+                    stu.stop_id = stop_id
+                    stu.arrival.time = t
+                    stu.departure.time = t + 30
+                    t += rnd.randint(60, 180)
+    return feed.SerializeToString()
+
+
+def synthetic_fixtures(
+    routes: Optional[List[str]] = None,
+    watch_stops: Optional[List[str]] = None,
+    zip_code: str = "11201",
+    now: Optional[float] = None,
+    seed: int = 0,
+) -> FixtureStore:
+    """
+    Build a fixture store covering every upstream the built-in plugins use.
+
+    Includes one GTFS-RT feed per distinct MTA feed URL for the routes, the
+    zippopotam.us geocode for zip_code and the NWS points and forecast
+    responses for the default location.
+    """
+    from mini_display.plugins.subway_plugin import ROUTE_FEEDS
+
+    routes = routes or ["A", "C", "F", "R"]
+    watch_stops = watch_stops if watch_stops is not None else ["A41", "R29"]
+    now = now if now is not None else time.time()
+    store = FixtureStore()
+
+    by_feed: Dict[str, List[str]] = {}
+    for route in routes:
+        url = ROUTE_FEEDS.get(route)
+        if url is not None:
+            by_feed.setdefault(url, []).append(route)
+    for i, (url, feed_routes) in enumerate(sorted(by_feed.items())):
+        body = synthetic_gtfs_feed(feed_routes, watch_stops, now=now, seed=seed + i)
+        store.add(Fixture(url=url, body=body, headers={"Content-Type": "application/octet-stream"}))
+
+    lat, lon = NWS_POINT
+    geo = {"post code": zip_code, "places": [{"latitude": str(lat), "longitude": str(lon)}]}
+    store.add(Fixture(
+        url=f"https://api.zippopotam.us/us/{zip_code}",
+        body=json.dumps(geo).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    ))
+
+    points = {"properties": {"forecast": NWS_FORECAST_URL, "forecastHourly": NWS_HOURLY_URL}}
+    store.add(Fixture(
+        url=f"https://api.weather.gov/points/{lat},{lon}",
+        body=json.dumps(points).encode("utf-8"),
+        headers={"Content-Type": "application/geo+json", "Cache-Control": "public, max-age=86400"},
+    ))
+
+    def forecast(url: str, count: int, length: int, start: float) -> None:
+        periods = []
+        for i in range(count):
+            periods.append({
+                "number": i + 1,
+                "startTime": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(start + i * length)),
+                "endTime": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(start + (i + 1) * length)),
+                "temperature": 50 + (i * 7) % 25,
+                "temperatureUnit": "F",
+                "shortForecast": "Partly Cloudy",
+            })
+        body = json.dumps({"properties": {"periods": periods}}).encode("utf-8")
+        store.add(Fixture(
+            url=url,
+            body=body,
+            headers={
+                "Content-Type": "application/geo+json",
+                "ETag": '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+            },
+        ))
+
+    forecast(NWS_FORECAST_URL, 14, 43200, now)
+    hour = now - now % 3600
+    forecast(NWS_HOURLY_URL, 156, 3600, hour)
+    return store
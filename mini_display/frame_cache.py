@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Frame cache - reuse rendered frames while a plugin's visible state is unchanged.
+
+Frames are drawn with Plugin.render_into() into images from a small pool, so
+steady-state rendering allocates no new images: frames evicted from the cache
+are recycled for later cache misses, and plugins without a state key draw
+into a short ring of scratch canvases.
+"""
+
+import threading
+import weakref
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image
+
+from mini_display.metrics import RENDER_SECONDS
+from mini_display.plugin_base import Plugin, uses_render_into
+from mini_display.utils import LRUCache
+
+
+class ImagePool:
+    """Preallocated RGB images, reused instead of allocating per frame."""
+
+    def __init__(self, ring_size: int = 3, max_free: int = 4):
+        """
+        Args:
+            ring_size: Scratch canvases per size; a scratch canvas is reused
+                ring_size acquisitions later, so the frame on the panel is
+                never drawn over
+            max_free: Released images kept per size for take()
+        """
+        self.ring_size = max(2, ring_size)
+        self.max_free = max_free
+        self._rings: Dict[Tuple[int, int], Tuple[List[Image.Image], List[int]]] = {}
+        self._free: Dict[Tuple[int, int], List[Image.Image]] = {}
+        # Images handed out by take(), by id (PIL images are not hashable)
+        self._taken: Dict[int, "weakref.ref[Image.Image]"] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _clear(img: Image.Image) -> Image.Image:
+        """Blank an image in place."""
+        img.paste((0, 0, 0), (0, 0) + img.size)
+        return img
+
+    def _forget(self, key: int):
+        """Weakref callback dropping a collected image from _taken."""
+        def forget(ref):
+            with self._lock:
+                if self._taken.get(key) is ref:
+                    del self._taken[key]
+        return forget
+
+    def acquire(self, width: int, height: int) -> Image.Image:
+        """Next cleared scratch canvas of the given size from the ring."""
+        size = (width, height)
+        with self._lock:
+            ring = self._rings.get(size)
+            if ring is None:
+                ring = ([Image.new("RGB", size) for _ in range(self.ring_size)], [0])
+                self._rings[size] = ring
+            images, pos = ring
+            pos[0] = (pos[0] + 1) % len(images)
+            img = images[pos[0]]
+        return self._clear(img)
+
+    def take(self, width: int, height: int) -> Image.Image:
+        """A cleared image the caller keeps until it is released."""
+        with self._lock:
+            free = self._free.get((width, height))
+            img = free.pop() if free else None
+        if img is None:
+            img = Image.new("RGB", (width, height))
+            with self._lock:
+                self._taken[id(img)] = weakref.ref(img, self._forget(id(img)))
+            return img
+        return self._clear(img)
+
+    def release(self, img: Image.Image) -> None:
+        """Return an image obtained from take() for reuse; others are ignored."""
+        with self._lock:
+            ref = self._taken.get(id(img))
+            if ref is None or ref() is not img:
+                return
+            free = self._free.setdefault(img.size, [])
+            if len(free) < self.max_free:
+                free.append(img)
+
+
+class FrameCache:
+    """Rendered frames keyed by plugin, canvas size and plugin state key."""
+
+    def __init__(self, maxsize: int = 32, pool: Optional[ImagePool] = None):
+        """
+        Args:
+            maxsize: Maximum number of frames kept across all plugins
+            pool: Image pool to draw into (default: a new one)
+        """
+        self._frames = LRUCache(max(2, maxsize))
+        self.pool = pool or ImagePool()
+
+    @property
+    def hits(self) -> int:
+        """Renders answered from the cache."""
+        return self._frames.hits
+
+    @property
+    def misses(self) -> int:
+        """Cacheable renders that had to call the plugin."""
+        return self._frames.misses
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @staticmethod
+    def _draw(plugin: Plugin, canvas: Image.Image) -> None:
+        """Call the plugin's render_into() on a whole canvas, recording its duration."""
+        with RENDER_SECONDS.labels(plugin.name).time():
+            plugin.render_into(canvas, (0, 0) + canvas.size)
+
+    @staticmethod
+    def _render(plugin: Plugin, width: int, height: int) -> Image.Image:
+        """Call an old-style plugin's render(), recording its duration."""
+        with RENDER_SECONDS.labels(plugin.name).time():
+            return plugin.render(width=width, height=height)
+
+    def render(self, plugin: Plugin, width: int, height: int) -> Tuple[Image.Image, Optional[Hashable]]:
+        """
+        Return a frame for the plugin, rendering only on a cache miss.
+        
+        Args:
+            plugin: Plugin to render
+            width: Display width in pixels
+            height: Display height in pixels
+            
+        Returns:
+            Tuple of (image, frame key). The key is None for frames that
+            could not be cached, and otherwise identifies the frame content.
+            Uncached frames may be drawn into a scratch canvas that is
+            reused a few frames later.
+        """
+        pooled = uses_render_into(plugin)
+        state = plugin.state_key()
+        if state is None:
+            if not pooled:
+                return self._render(plugin, width, height), None
+            img = self.pool.acquire(width, height)
+            self._draw(plugin, img)
+            return img, None
+        key = (id(plugin), width, height, state)
+        img = self._frames.get(key)
+        if img is None:
+            if pooled:
+                img = self.pool.take(width, height)
+                self._draw(plugin, img)
+            else:
+                img = self._render(plugin, width, height)
+            # A background refresh may have landed mid-render; only cache
+            # frames whose state is known to match the key.
+            if plugin.state_key() != state:
+                return img, None
+            for old in self._frames.put(key, img):
+                self.pool.release(old)
+        return img, key
+
+    def clear(self) -> None:
+        """Drop all cached frames."""
+        self._frames.clear()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Frame server - fan one renderer out to many panels.
+
+With `--serve` one mini-display process runs the plugins and, besides showing
+frames on its own backend, streams every presented frame over TCP. Panels
+started with `--connect` run no plugins: they receive frames and push them
+straight to their matrix, so a fleet of Pi Zeros does no fetching, parsing or
+rendering and upstream load stays the same however many panels there are.
+
+Protocol (all integers big-endian):
+
+    server hello:  b"MDFS", version (u8), width (u16), height (u16)
+    message:       kind (u8), payload length (u32), payload
+
+A KEY payload is the whole frame as raw RGB bytes. A DELTA payload is a run
+of spans, each (byte offset u32, length u32, bytes), replacing the changed
+bytes of the previous frame. HEARTBEAT messages are empty and keep idle
+connections alive. A client gets a key frame when it connects and whenever
+it has fallen behind; otherwise it gets deltas.
+"""
+
+import socket
+import struct
+import threading
+from typing import List, Optional, Set, Tuple
+
+from PIL import Image
+
+from mini_display.metrics import REGISTRY, Counter
+
+MAGIC = b"MDFS"
+VERSION = 1
+
+KEY = 0
+DELTA = 1
+HEARTBEAT = 2
+
+_HELLO = struct.Struct("!4sBHH")
+_MESSAGE = struct.Struct("!BI")
+_SPAN = struct.Struct("!II")
+
+# Seconds between heartbeats on an idle connection, and how long a client
+# waits for any message before reconnecting
+HEARTBEAT_SEC = 5.0
+_CLIENT_TIMEOUT_SEC = 3 * HEARTBEAT_SEC
+
+SERVED_BYTES = REGISTRY.register(Counter(
+    "mini_display_served_bytes", "Frame bytes streamed to --connect clients.", ("kind",)))
+
+
+def parse_address(spec: str, default_host: str = "0.0.0.0") -> Tuple[str, int]:
+    """
+    Parse HOST:PORT, or just PORT.
+
+    Raises:
+        ValueError: If the port is missing or not a number
+    """
+    host, sep, port = spec.rpartition(":")
+    if not sep:
+        host = default_host
+    try:
+        return host.strip("[]") or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"Invalid address: {spec!r}, expected HOST:PORT") from None
+
+
+def encode_delta(prev: bytes, cur: bytes, stride: int) -> bytes:
+    """
+    Spans of cur that differ from prev.
+
+    Frames are compared row by row (stride bytes each); each run of changed
+    rows becomes one span, trimmed of unchanged bytes at both ends.
+    """
+    parts: List[bytes] = []
+    rows = len(cur) // stride
+    row = 0
+    while row < rows:
+        a = row * stride
+        if cur[a:a + stride] == prev[a:a + stride]:
+            row += 1
+            continue
+        end = row + 1
+        while end < rows and cur[end * stride:(end + 1) * stride] != prev[end * stride:(end + 1) * stride]:
+            end += 1
+        start, stop = a, end * stride
+        while cur[start] == prev[start]:
+            start += 1
+        while cur[stop - 1] == prev[stop - 1]:
+            stop -= 1
+        parts.append(_SPAN.pack(start, stop - start))
+        parts.append(cur[start:stop])
+        row = end
+    return b"".join(parts)
+
+
+def apply_delta(frame: bytearray, payload: memoryview) -> None:
+    """
+    Apply the spans of a DELTA payload to a frame in place.
+
+    Raises:
+        ValueError: If a span is truncated or falls outside the frame
+    """
+    pos = 0
+    end = len(payload)
+    while pos < end:
+        if pos + _SPAN.size > end:
+            raise ValueError("Truncated delta span")
+        offset, length = _SPAN.unpack_from(payload, pos)
+        pos += _SPAN.size
+        if offset + length > len(frame) or pos + length > end:
+            raise ValueError("Delta span out of bounds")
+        frame[offset:offset + length] = payload[pos:pos + length]
+        pos += length
+
+
+def parse_hello(data: bytes) -> Tuple[int, int]:
+    """
+    Frame size announced by a server hello.
+
+    Returns:
+        (width, height)
+
+    Raises:
+        ValueError: If it is not a hello from a compatible server
+    """
+    magic, version, width, height = _HELLO.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a mini-display frame server")
+    return width, height
+
+
+def parse_header(data: bytes, size: int) -> Tuple[int, int]:
+    """
+    Kind and payload length of a message, checked against the frame size.
+
+    Returns:
+        (kind, length)
+
+    Raises:
+        ValueError: If the payload is larger than a frame, or a key frame
+            is not exactly one frame
+    """
+    kind, length = _MESSAGE.unpack(data)
+    if length > size:
+        raise ValueError("Oversized frame message")
+    if kind == KEY and length != size:
+        raise ValueError("Key frame does not match the frame size")
+    return kind, length
+
+
+class FrameServer:
+    """Streams presented frames to connected clients over TCP."""
+
+    def __init__(self, width: int, height: int, port: int, host: str = "0.0.0.0"):
+        """
+        Args:
+            width: Frame width in pixels
+            height: Frame height in pixels
+            port: TCP port to listen on (0 picks a free port)
+            host: Address to bind (default: all interfaces)
+        """
+        self.width = width
+        self.height = height
+        self._size = width * height * 3
+        self._hello = _HELLO.pack(MAGIC, VERSION, width, height)
+        self._listener = socket.create_server((host, port))
+        self._cond = threading.Condition()
+        self._closing = False
+        self._clients: Set[socket.socket] = set()
+        # Latest frame, its sequence number and the delta from the one before
+        self._seq = 0
+        self._frame: Optional[bytes] = None
+        self._delta: Optional[bytes] = None
+        self._thread = threading.Thread(target=self._accept, name="mini-display-frame-server", daemon=True)
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return self._listener.getsockname()[1]
+
+    @property
+    def clients(self) -> int:
+        """Number of connected clients."""
+        with self._cond:
+            return len(self._clients)
+
+    def start(self) -> None:
+        """Start accepting clients."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Disconnect all clients and close the listening socket."""
+        with self._cond:
+            self._closing = True
+            clients = list(self._clients)
+            self._cond.notify_all()
+        # Shut down first: close() alone does not wake a blocked accept()
+        for sock in [self._listener] + clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._listener.close()
+        if self._thread.is_alive():
+            self._thread.join(1.0)
+
+    def publish(self, img: Optional[Image.Image]) -> None:
+        """Send a frame to every client; None sends a blank frame."""
+        if img is None:
+            cur = bytes(self._size)
+        else:
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if img.size != (self.width, self.height):
+                img = img.crop((0, 0, self.width, self.height))
+            cur = img.tobytes()
+        with self._cond:
+            prev = self._frame
+            delta = None
+            if self._clients and prev is not None:
+                delta = encode_delta(prev, cur, self.width * 3)
+            self._frame = cur
+            self._delta = delta
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _accept(self) -> None:
+        """Accept connections, one sender thread per client."""
+        while True:
+            try:
+                conn, _addr = self._listener.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Heartbeats keep live clients busy; a vanished one times out
+            conn.settimeout(_CLIENT_TIMEOUT_SEC)
+            with self._cond:
+                if self._closing:
+                    conn.close()
+                    return
+                self._clients.add(conn)
+            threading.Thread(target=self._send_frames, args=(conn,), name="mini-display-frame-client", daemon=True).start()
+
+    def _send_frames(self, conn: socket.socket) -> None:
+        """Sender thread: key frame first, then deltas while the client keeps up."""
+        sent = 0
+        try:
+            conn.sendall(self._hello)
+            while True:
+                with self._cond:
+                    if self._seq == sent and not self._closing:
+                        self._cond.wait(HEARTBEAT_SEC)
+                    if self._closing:
+                        return
+                    seq, frame, delta = self._seq, self._frame, self._delta
+                if seq == sent or frame is None:
+                    conn.sendall(_MESSAGE.pack(HEARTBEAT, 0))
+                    continue
+                if sent and seq == sent + 1 and delta is not None and len(delta) < len(frame):
+                    kind, payload = DELTA, delta
+                    SERVED_BYTES.labels("delta").inc(len(payload))
+                else:
+                    kind, payload = KEY, frame
+                    SERVED_BYTES.labels("key").inc(len(payload))
+                conn.sendall(_MESSAGE.pack(kind, len(payload)) + payload)
+                sent = seq
+        except OSError:
+            pass
+        finally:
+            with self._cond:
+                self._clients.discard(conn)
+            conn.close()
+
+
+class FrameClient:
+    """Shows frames streamed from a FrameServer on a local output."""
+
+    def __init__(self, host: str, port: int, output, retry_seconds: float = 5.0):
+        """
+        Args:
+            host: Server address
+            port: Server port
+            output: FrameOutput to present frames on
+            retry_seconds: Delay between reconnection attempts
+        """
+        self.host = host
+        self.port = port
+        self.output = output
+        self.retry_seconds = retry_seconds
+        self.frames = 0
+        self._stop = threading.Event()
+        self._sock: Optional[socket.socket] = None
+
+    def stop(self) -> None:
+        """Stop the client. Safe to call from signal handlers and other threads."""
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _recv_into(sock: socket.socket, view: memoryview) -> None:
+        """Fill view from the socket, raising ConnectionError at EOF."""
+        while len(view):
+            n = sock.recv_into(view)
+            if n == 0:
+                raise ConnectionError("Frame server closed the connection")
+            view = view[n:]
+
+    def run(self) -> None:
+        """Receive and present frames until stop() is called, reconnecting as needed.
+
+        The last frame stays on the panel while disconnected.
+        """
+        while not self._stop.is_set():
+            try:
+                self._session()
+            except (OSError, ValueError):
+                pass
+            self._sock = None
+            self._stop.wait(self.retry_seconds)
+
+    def _session(self) -> None:
+        """One connection: read the hello, then apply and present messages."""
+        sock = socket.create_connection((self.host, self.port), timeout=_CLIENT_TIMEOUT_SEC)
+        self._sock = sock
+        with sock:
+            if self._stop.is_set():
+                return
+            hello = bytearray(_HELLO.size)
+            self._recv_into(sock, memoryview(hello))
+            width, height = parse_hello(hello)
+            size = width * height * 3
+            frame = bytearray(size)
+            payload = bytearray(size)
+            header = bytearray(_MESSAGE.size)
+            # Decoded into in place for every frame rather than reallocated
+            img = Image.new("RGB", (width, height))
+            while not self._stop.is_set():
+                self._recv_into(sock, memoryview(header))
+                kind, length = parse_header(header, size)
+                view = memoryview(payload)[:length]
+                self._recv_into(sock, view)
+                if kind == KEY:
+                    frame[:] = view
+                elif kind == DELTA:
+                    apply_delta(frame, view)
+                else:
+                    continue
+                img.frombytes(frame)
+                self.output.present(img)
+                self.frames += 1
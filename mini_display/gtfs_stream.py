@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Streaming, filter-first GTFS-RT decoder.
+
+Walks the protobuf wire format of a GTFS-realtime FeedMessage directly and
+only decodes what is needed to answer "when does a train on one of these
+routes next reach one of these stops". Entities that are not trip updates,
+trips on other routes and stop time updates for other stops are skipped by
+length without being decoded, so no object graph is built for the feed and
+peak memory stays close to the size of the downloaded bytes.
+
+Only the handful of fields used below are understood; everything else,
+including the NYCT extensions, is skipped.
+"""
+
+from typing import Iterator, List, Optional, Set, Tuple
+
+# Field numbers from gtfs-realtime.proto
+_FEED_ENTITY = 2             # FeedMessage.entity
+_ENTITY_TRIP_UPDATE = 3      # FeedEntity.trip_update
+_TU_TRIP = 1                 # TripUpdate.trip
+_TU_STOP_TIME_UPDATE = 2     # TripUpdate.stop_time_update
+_TRIP_TRIP_ID = 1            # TripDescriptor.trip_id
+_TRIP_ROUTE_ID = 5           # TripDescriptor.route_id
+_STU_ARRIVAL = 2             # StopTimeUpdate.arrival
+_STU_DEPARTURE = 3           # StopTimeUpdate.departure
+_STU_STOP_ID = 4             # StopTimeUpdate.stop_id
+_EVENT_TIME = 2              # StopTimeEvent.time
+
+# (route_id, direction, stop_id, epoch seconds)
+Arrival = Tuple[str, str, str, int]
+
+
+def _varint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    """Decode a varint at pos; return (value, new position)."""
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip(buf: memoryview, pos: int, wire_type: int) -> int:
+    """Skip a field value of the given wire type; return the new position."""
+    if wire_type == 0:
+        while buf[pos] & 0x80:
+            pos += 1
+        return pos + 1
+    if wire_type == 2:
+        n, pos = _varint(buf, pos)
+        return pos + n
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+
+
+def _fields(buf: memoryview, pos: int, end: int) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Iterate over the fields of a message occupying buf[pos:end].
+
+    Yields (field number, wire type, value start, value end). For
+    length-delimited fields the value span excludes the length prefix; for
+    varints the span covers the encoded varint.
+    """
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 2:
+            n, pos = _varint(buf, pos)
+            yield field, wire_type, pos, pos + n
+            pos += n
+        else:
+            start = pos
+            pos = _skip(buf, pos, wire_type)
+            yield field, wire_type, start, pos
+
+
+def _event_time(buf: memoryview, pos: int, end: int) -> int:
+    """StopTimeEvent.time, or 0 if absent."""
+    for field, wire_type, start, _ in _fields(buf, pos, end):
+        if field == _EVENT_TIME and wire_type == 0:
+            return _varint(buf, start)[0]
+    return 0
+
+
+def _trip_descriptor(buf: memoryview, pos: int, end: int) -> Tuple[str, str]:
+    """(trip_id, route_id) of a TripDescriptor."""
+    trip_id = route_id = ""
+    for field, wire_type, start, stop in _fields(buf, pos, end):
+        if wire_type != 2:
+            continue
+        if field == _TRIP_TRIP_ID:
+            trip_id = bytes(buf[start:stop]).decode("utf-8", "replace")
+        elif field == _TRIP_ROUTE_ID:
+            route_id = bytes(buf[start:stop]).decode("utf-8", "replace")
+    return trip_id, route_id
+
+
+def _direction(trip_id: str, stop_id: str) -> str:
+    """Travel direction ("N"/"S") from the platform stop ID or the NYCT trip ID."""
+    if stop_id[-1:] in ("N", "S"):
+        return stop_id[-1]
+    shape = trip_id.split("_", 1)[1] if "_" in trip_id else ""
+    parts = shape.split("..") if ".." in shape else shape.split(".")
+    return parts[1][:1] if len(parts) > 1 else ""
+
+
+def _first_arrival(
+    buf: memoryview, spans: List[Tuple[int, int]], stop_keys: Set[bytes], not_before: int
+) -> Optional[Tuple[str, int]]:
+    """First stop time update at a wanted stop, at or after not_before.
+
+    Arrival and departure precede stop_id on the wire, so only their spans
+    are noted; the times are decoded once the stop is known to be wanted.
+    """
+    for pos, end in spans:
+        stop_id = None
+        arrival = departure = None
+        for field, wire_type, start, stop in _fields(buf, pos, end):
+            if wire_type != 2:
+                continue
+            if field == _STU_STOP_ID:
+                stop_id = bytes(buf[start:stop])
+                if stop_id not in stop_keys:
+                    break
+            elif field == _STU_ARRIVAL:
+                arrival = (start, stop)
+            elif field == _STU_DEPARTURE:
+                departure = (start, stop)
+        else:
+            if stop_id is None:
+                continue
+            t = _event_time(buf, *arrival) if arrival else 0
+            if not t and departure:
+                t = _event_time(buf, *departure)
+            if t and t >= not_before:
+                return stop_id.decode("utf-8"), t
+    return None
+
+
+def iter_arrivals(data: bytes, routes: Set[str], stop_ids: Set[str], not_before: int = 0) -> Iterator[Arrival]:
+    """
+    Yield the next arrival of each matching trip in a serialized FeedMessage.
+
+    Args:
+        data: Serialized GTFS-realtime FeedMessage
+        routes: Route IDs to keep
+        stop_ids: Stop IDs to keep (platform IDs, e.g. "A41N")
+        not_before: Ignore arrivals earlier than this epoch time
+
+    Yields:
+        (route_id, direction, stop_id, epoch seconds) for the first wanted
+        stop of every trip update on a wanted route
+    """
+    buf = memoryview(data)
+    stop_keys = {s.encode("utf-8") for s in stop_ids}
+    for field, wire_type, pos, end in _fields(buf, 0, len(buf)):
+        if field != _FEED_ENTITY or wire_type != 2:
+            continue
+        for e_field, e_wire, tu_pos, tu_end in _fields(buf, pos, end):
+            if e_field != _ENTITY_TRIP_UPDATE or e_wire != 2:
+                continue
+            trip_id = route_id = None
+            spans: List[Tuple[int, int]] = []
+            for t_field, t_wire, start, stop in _fields(buf, tu_pos, tu_end):
+                if t_wire != 2:
+                    continue
+                if t_field == _TU_TRIP:
+                    trip_id, route_id = _trip_descriptor(buf, start, stop)
+                    if route_id not in routes:
+                        break
+                elif t_field == _TU_STOP_TIME_UPDATE:
+                    spans.append((start, stop))
+            if route_id is None or route_id not in routes:
+                continue
+            hit = _first_arrival(buf, spans, stop_keys, not_before)
+            if hit is not None:
+                stop_id, t = hit
+                yield route_id, _direction(trip_id or "", stop_id), stop_id, t
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+HTTP helpers - pooled sessions and a persistent, revalidating response cache.
+
+All plugins share one pooled requests.Session so connections are reused
+across fetches. HttpCache keeps response bodies on disk together with their
+validators and expiry, serves fresh entries without touching the network and
+revalidates stale ones with conditional GETs (If-None-Match /
+If-Modified-Since), so an unchanged resource costs one cheap 304. While
+the origin is down, stale entries are served rather than nothing.
+"""
+
+import base64
+import dataclasses
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def default_cache_dir() -> str:
+    """Directory for persistent caches ($XDG_CACHE_HOME/mini-display)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mini-display")
+
+
+class DiskStore:
+    """Small JSON-backed key/value store, written atomically on change.
+
+    If the file cannot be written (read-only filesystem, permissions) the
+    store keeps working in memory.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._data: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as fp:
+                    self._data = json.load(fp)
+            except Exception:
+                self._data = {}
+
+    def get(self, key: str, default=None):
+        """Return the stored value for key."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: str, value) -> None:
+        """Store a JSON-serializable value and persist the store."""
+        with self._lock:
+            if self._data.get(key) == value:
+                return
+            self._data[key] = value
+            self._flush()
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Write the store to disk; caller holds the lock."""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(self._data, fp)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+def freshness_lifetime(headers, now: Optional[float] = None) -> float:
+    """
+    Seconds a response stays fresh according to Cache-Control / Expires.
+
+    Returns 0 for responses that must be revalidated on every use.
+    """
+    now = time.time() if now is None else now
+    cc = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cc or "no-cache" in cc:
+        return 0.0
+    m = re.search(r"(?:^|[,\s])max-age\s*=\s*(\d+)", cc)
+    if m:
+        age = float(headers.get("Age") or 0)
+        return max(0.0, float(m.group(1)) - age)
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            exp = parsedate_to_datetime(expires).timestamp()
+            date = headers.get("Date")
+            base = parsedate_to_datetime(date).timestamp() if date else now
+            return max(0.0, exp - base)
+        except Exception:
+            return 0.0
+    return 0.0
+
+
+@dataclasses.dataclass
+class CachedResponse:
+    """Body of a (possibly cached) response."""
+    content: bytes
+    status: int
+    from_cache: bool
+    revalidated: bool = False
+    expires: float = 0.0
+    # Served past its lifetime because the origin could not be reached
+    stale: bool = False
+
+    def json(self):
+        """Decode the body as JSON."""
+        return json.loads(self.content.decode("utf-8"))
+
+
+class HttpCache:
+    """Persistent HTTP response cache with conditional revalidation."""
+
+    def __init__(self, path: Optional[str] = None, session: Optional[requests.Session] = None):
+        """
+        Args:
+            path: JSON file holding cached responses (None for memory only)
+            session: Session to fetch with (default: the shared pooled one)
+        """
+        self._store = DiskStore(path)
+        self._session = session
+        # Lifetimes extended by 304s are kept in memory; the entry on disk
+        # is only rewritten when its validators change
+        self._expires: Dict[str, float] = {}
+
+    @property
+    def session(self) -> requests.Session:
+        """Session used for network requests."""
+        return self._session or get_session()
+
+    def invalidate(self, url: str) -> None:
+        """Forget the cached response for a URL."""
+        self._expires.pop(url, None)
+        self._store.delete(url)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 6) -> CachedResponse:
+        """
+        GET a URL through the cache.
+
+        Fresh entries are returned without a request. Stale entries are
+        revalidated with their ETag / Last-Modified; on 304 the cached body
+        is returned and its lifetime extended. If the origin cannot be
+        reached or answers with a 5xx, a stale entry is returned with
+        stale=True.
+
+        Raises:
+            requests.RequestException: On network errors or non-2xx responses
+                when nothing usable is cached
+        """
+        now = time.time()
+        entry = self._store.get(url)
+        if entry:
+            expires = max(entry.get("expires", 0), self._expires.get(url, 0))
+            if expires > now:
+                return CachedResponse(
+                    base64.b64decode(entry["body"]), entry["status"], from_cache=True, expires=expires
+                )
+
+        req_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                req_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                req_headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            r = self.session.get(url, headers=req_headers, timeout=timeout)
+        except requests.RequestException:
+            if not entry:
+                raise
+            return self._stale(url, entry)
+        if r.status_code >= 500 and entry:
+            return self._stale(url, entry)
+        if r.status_code == 304 and entry:
+            expires = now + freshness_lifetime(r.headers, now)
+            etag = r.headers.get("ETag")
+            if etag and etag != entry.get("etag"):
+                self._store.set(url, dict(entry, etag=etag, expires=expires))
+            self._expires[url] = expires
+            return CachedResponse(
+                base64.b64decode(entry["body"]), entry["status"], from_cache=True, revalidated=True,
+                expires=expires,
+            )
+        r.raise_for_status()
+
+        expires = now + freshness_lifetime(r.headers, now)
+        cc = (r.headers.get("Cache-Control") or "").lower()
+        if "no-store" not in cc:
+            self._store.set(url, {
+                "status": r.status_code,
+                "body": base64.b64encode(r.content).decode("ascii"),
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "expires": expires,
+            })
+            self._expires.pop(url, None)
+        return CachedResponse(r.content, r.status_code, from_cache=False, expires=expires)
+
+    def _stale(self, url: str, entry: dict) -> CachedResponse:
+        """The cached entry for a URL, marked stale."""
+        return CachedResponse(
+            base64.b64decode(entry["body"]), entry["status"], from_cache=True,
+            expires=max(entry.get("expires", 0), self._expires.get(url, 0)), stale=True,
+        )
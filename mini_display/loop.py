@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Display loop - event-driven plugin rotation on a monotonic clock.
+
+The loop sleeps until the next deadline (end of the current slot, or the
+moment the current plugin's display is due to change) and wakes immediately
+when it is stopped or when the plugin on screen reports new data. Wall-clock
+jumps (NTP, DST) do not affect slot timing.
+
+At every slot the loop tells the fetch scheduler when each plugin next goes
+on screen, so refreshes land just before they are needed. During quiet hours
+the panel is blanked and the rotation paused.
+"""
+
+import threading
+import time
+from typing import List, Optional
+
+from PIL import Image, ImageDraw
+
+from mini_display.frame_cache import FrameCache
+from mini_display.metrics import DEADLINE_MISSES, PLUGIN_ERRORS, TICK_SECONDS
+from mini_display.output import FrameOutput
+from mini_display.plugin_base import Plugin
+from mini_display.scheduler import FetchScheduler, QuietHours
+from mini_display.transitions import TransitionEngine
+from mini_display.utils import draw_text, get_font
+
+
+class DisplayLoop:
+    """Rotates through plugins, one slot each, redrawing only when needed."""
+
+    def __init__(
+        self,
+        plugins: List[Plugin],
+        output: FrameOutput,
+        cycle_seconds: float = 6,
+        frames: Optional[FrameCache] = None,
+        transition: Optional[TransitionEngine] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        quiet_hours: Optional[QuietHours] = None,
+    ):
+        """
+        Args:
+            plugins: Plugins to rotate through
+            output: Output stage to present frames on
+            cycle_seconds: Seconds each plugin stays on screen
+            frames: Frame cache (default: a new one)
+            transition: Transition played between slots (default: cut)
+            scheduler: Background fetch scheduler; plugins it does not
+                handle are ticked on the loop thread
+            quiet_hours: Daily window during which the panel is blank
+        """
+        self.plugins = plugins
+        self.output = output
+        self.cycle_seconds = cycle_seconds
+        self.frames = frames or FrameCache()
+        self.transition = transition
+        self.scheduler = scheduler
+        self.quiet_hours = quiet_hours
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._current: Optional[Plugin] = None
+        for plugin in plugins:
+            plugin.set_change_listener(self._on_changed)
+
+    def stop(self) -> None:
+        """Stop the loop. Safe to call from signal handlers and other threads."""
+        self.stop_event.set()
+        self._wake.set()
+
+    def _on_changed(self, plugin: Plugin) -> None:
+        """Wake the loop if the plugin on screen has new data."""
+        if plugin is self._current:
+            self._wake.set()
+
+    def _error_frame(self, plugin: Plugin) -> Image.Image:
+        """Frame shown when a plugin fails to render."""
+        err = Image.new("RGB", (self.output.width, self.output.height), (80, 0, 0))
+        d = ImageDraw.Draw(err)
+        draw_text(d, 1, 5, f"{plugin.name} err", (255, 255, 255), get_font())
+        return err
+
+    def show(self, plugin: Plugin, transition: bool = False) -> None:
+        """
+        Render a plugin and present it, skipping unchanged frames.
+
+        Args:
+            plugin: Plugin to show
+            transition: Play the configured transition from the current frame
+        """
+        if self.scheduler is None or not self.scheduler.handles(plugin):
+            try:
+                with TICK_SECONDS.labels(plugin.name).time():
+                    plugin.tick()
+            except Exception:
+                PLUGIN_ERRORS.labels(plugin.name, "tick").inc()
+
+        try:
+            img, key = self.frames.render(plugin, self.output.width, self.output.height)
+            if (transition and self.transition is not None and self.transition.enabled
+                    and self.output.last_frame is not None and key != self.output.shown):
+                self.transition.play(self.output, self.output.last_frame, img, self.stop_event)
+            self.output.present(img, key)
+        except Exception:
+            PLUGIN_ERRORS.labels(plugin.name, "render").inc()
+            self.output.present(self._error_frame(plugin))
+
+    def _wait(self, plugin: Plugin, slot_end: float) -> None:
+        """Sleep through a slot, redrawing when the plugin's display changes."""
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            timeout = slot_end - now
+            if timeout <= 0:
+                return
+            change_in = plugin.seconds_until_change()
+            if change_in is not None:
+                timeout = min(timeout, max(0.01, change_in))
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self.stop_event.is_set() or time.monotonic() >= slot_end:
+                return
+            self.show(plugin)
+
+    def _rotating(self) -> bool:
+        """True if the scheduler should be told when plugins go on screen.
+
+        A single plugin is always on screen and refreshes on its own interval.
+        """
+        return self.scheduler is not None and len(self.plugins) > 1
+
+    def _sleep_quiet(self, idx: int, cycle: float) -> bool:
+        """Blank the panel until quiet hours end, if they have begun.
+
+        Returns:
+            True if the loop slept
+        """
+        if self.quiet_hours is None:
+            return False
+        remaining = self.quiet_hours.remaining()
+        if remaining <= 0:
+            return False
+        self._current = None
+        self.output.clear()
+        if self._rotating():
+            # Rotation resumes with plugin idx when the window ends
+            self.scheduler.plan_rotation(self.plugins, idx - 1, time.monotonic() + remaining, cycle)
+        self.stop_event.wait(remaining)
+        return True
+
+    def run(self, max_slots: Optional[int] = None) -> None:
+        """
+        Run until stop() is called.
+
+        Args:
+            max_slots: Also stop after showing this many plugin slots
+        """
+        if not self.plugins:
+            return
+        cycle = max(2.0, float(self.cycle_seconds))
+        slot_end = time.monotonic()
+        idx = 0
+        while not self.stop_event.is_set() and (max_slots is None or idx < max_slots):
+            if self._sleep_quiet(idx, cycle):
+                slot_end = time.monotonic()
+                continue
+            plugin = self.plugins[idx % len(self.plugins)]
+            self._current = plugin
+            self._wake.clear()
+            self.show(plugin, transition=True)
+
+            # Slots are laid out on fixed deadlines; if we fell behind (slow
+            # render, suspended process) start a fresh slot from now.
+            slot_end += cycle
+            now = time.monotonic()
+            if slot_end <= now:
+                DEADLINE_MISSES.labels("slot").inc()
+                slot_end = now + cycle
+            if self._rotating():
+                self.scheduler.plan_rotation(self.plugins, idx, slot_end, cycle)
+            self._wait(plugin, slot_end)
+            idx += 1
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Metrics - built-in runtime instrumentation in Prometheus text format.
+
+The display loop, fetch scheduler, plugins and output stage record tick,
+render, fetch and SetImage durations, fetch failures, swallowed plugin errors
+and frame deadline misses into a process-wide registry. Cache hit/miss counts
+are read from the caches themselves when metrics are collected.
+
+The registry can be served on a local HTTP port for Prometheus to scrape, or
+written periodically to a textfile for node_exporter's textfile collector.
+Recording is always on and costs a lock and a bisect per observation.
+"""
+
+import contextlib
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the duration histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (label values, sample name suffix, value) as produced by collectors
+Sample = Tuple[Dict[str, str], str, float]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render a label set as {k="v",...}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class _Metric:
+    """Named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child metric for a set of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[Sample]:
+        """Current samples of every child."""
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                yield dict(labels, **extra), suffix, value
+
+
+class _CounterValue:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self):
+        yield "_total", {}, self._value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (name without the _total suffix)."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+
+class _GaugeValue:
+    __slots__ = ("_value",)
+
+    def __init__(self):
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self._value = float(value)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self):
+        yield "", {}, self._value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+
+class _HistogramValue:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        i = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    @contextlib.contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the with-block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = 0
+        for bound, n in zip(self._bounds + (float("inf"),), counts):
+            cumulative += n
+            yield "_bucket", {"le": _format_value(bound)}, cumulative
+        yield "_sum", {}, total
+        yield "_count", {}, cumulative
+
+
+class Histogram(_Metric):
+    """Distribution of durations in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+
+class Registry:
+    """Collection of metrics and collectors rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[_Metric, Iterable[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry and return it."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[_Metric, Iterable[Sample]]]]) -> None:
+        """Add a callable producing (metric family, samples) pairs at collection time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def expose(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        families: Dict[str, Tuple[_Metric, List[Sample]]] = {}
+        for metric in metrics:
+            families[metric.name] = (metric, list(metric.samples()))
+        for collector in collectors:
+            try:
+                for metric, samples in collector():
+                    families.setdefault(metric.name, (metric, []))[1].extend(samples)
+            except Exception:
+                pass
+
+        lines: List[str] = []
+        for name, (metric, samples) in families.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, suffix, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TICK_SECONDS = REGISTRY.register(Histogram(
+    "mini_display_tick_seconds", "Duration of plugin tick()/refresh() calls.", ("plugin",)))
+RENDER_SECONDS = REGISTRY.register(Histogram(
+    "mini_display_render_seconds", "Duration of plugin render() calls.", ("plugin",)))
+FETCH_SECONDS = REGISTRY.register(Histogram(
+    "mini_display_fetch_seconds", "Duration of upstream data fetches.", ("plugin",)))
+FETCH_FAILURES = REGISTRY.register(Counter(
+    "mini_display_fetch_failures", "Upstream data fetches that failed.", ("plugin",)))
+PLUGIN_ERRORS = REGISTRY.register(Counter(
+    "mini_display_plugin_errors", "Exceptions raised by plugins and swallowed by the display.",
+    ("plugin", "stage")))
+SET_IMAGE_SECONDS = REGISTRY.register(Histogram(
+    "mini_display_set_image_seconds", "Duration of uploading a frame with SetImage."))
+DEADLINE_MISSES = REGISTRY.register(Counter(
+    "mini_display_deadline_misses", "Frame or slot deadlines that were missed.", ("stage",)))
+
+_CACHE_HITS = Counter("mini_display_cache_hits", "Cache lookups that found an entry.", ("cache",))
+_CACHE_MISSES = Counter("mini_display_cache_misses", "Cache lookups that missed.", ("cache",))
+_CACHE_ENTRIES = Gauge("mini_display_cache_entries", "Entries currently held in a cache.", ("cache",))
+_RESIDENT_BYTES = Gauge("mini_display_resident_memory_bytes", "Resident memory of the display process.")
+
+
+def _collect_resident():
+    """Current resident set size from /proc (Linux only)."""
+    with open("/proc/self/statm", "r") as fp:
+        pages = int(fp.read().split()[1])
+    return [(_RESIDENT_BYTES, [({}, "", pages * os.sysconf("SC_PAGE_SIZE"))])]
+
+
+REGISTRY.add_collector(_collect_resident)
+
+
+def watch_cache(name: str, cache, registry: Registry = REGISTRY) -> None:
+    """
+    Export a cache's hit/miss counters and size.
+
+    Args:
+        name: Value of the "cache" label
+        cache: Object with hits and misses attributes and a length (LRUCache,
+            FrameCache). Only a weak reference is kept.
+        registry: Registry to export through
+    """
+    ref = weakref.ref(cache)
+
+    def collect():
+        obj = ref()
+        if obj is None:
+            return []
+        labels = {"cache": name}
+        return [
+            (_CACHE_HITS, [(labels, "_total", obj.hits)]),
+            (_CACHE_MISSES, [(labels, "_total", obj.misses)]),
+            (_CACHE_ENTRIES, [(labels, "", len(obj))]),
+        ]
+
+    registry.add_collector(collect)
+
+
+@contextlib.contextmanager
+def track_fetch(plugin: str) -> Iterator[None]:
+    """Time an upstream fetch for a plugin, counting it as failed if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        FETCH_FAILURES.labels(plugin).inc()
+        raise
+    finally:
+        FETCH_SECONDS.labels(plugin).observe(time.perf_counter() - start)
+
+
+class MetricsServer:
+    """Serves the registry at /metrics over HTTP on a background thread."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+        """
+        Args:
+            port: TCP port to listen on (0 picks a free port)
+            host: Address to bind (default: localhost only)
+            registry: Registry to serve
+        """
+        import http.server
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mini-display-metrics", daemon=True)
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        """Start serving."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+
+class TextfileWriter:
+    """Periodically writes the registry to a file, atomically."""
+
+    def __init__(self, path: str, interval: float = 15.0, registry: Registry = REGISTRY):
+        """
+        Args:
+            path: Output file (e.g. in node_exporter's textfile directory;
+                it should end in .prom)
+            interval: Seconds between writes
+            registry: Registry to write
+        """
+        self.path = path
+        self.interval = max(1.0, float(interval))
+        self._registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mini-display-metrics", daemon=True)
+
+    def start(self) -> None:
+        """Write now and then every interval."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop writing, after one final write."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def write(self) -> None:
+        """Write the current metrics; errors are ignored."""
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                fp.write(self._registry.expose())
+            # mkstemp creates the file 0600; the collector usually runs as
+            # another user
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            self.write()
+            if self._stop.wait(self.interval):
+                self.write()
+                return
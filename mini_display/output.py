@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Output stage - double-buffered frame presentation on the matrix.
+
+Frames are drawn into an offscreen canvas from matrix.CreateFrameCanvas() and
+presented with SwapOnVSync, so the panel never shows a half-written frame.
+"""
+
+import time
+from typing import Hashable, Optional
+
+from PIL import Image
+
+from mini_display.metrics import SET_IMAGE_SECONDS
+
+
+class FrameOutput:
+    """Owns the back buffer and presents frames tear-free."""
+
+    def __init__(self, matrix, mirror=None):
+        """
+        Args:
+            matrix: RGBMatrix (or compatible) to present frames on
+            mirror: Also publish every presented frame here (a FrameServer)
+        """
+        self.matrix = matrix
+        self.mirror = mirror
+        self._back = matrix.CreateFrameCanvas()
+        self._shown: Optional[Hashable] = None
+        self.last_frame: Optional[Image.Image] = None
+
+    @property
+    def width(self) -> int:
+        """Display width in pixels."""
+        return self.matrix.width
+
+    @property
+    def height(self) -> int:
+        """Display height in pixels."""
+        return self.matrix.height
+
+    @property
+    def shown(self) -> Optional[Hashable]:
+        """Key of the frame currently on the panel (None if unknown)."""
+        return self._shown
+
+    def present(self, img: Image.Image, key: Optional[Hashable] = None) -> bool:
+        """
+        Draw a frame into the back buffer and swap it in on the next vsync.
+        
+        Args:
+            img: Frame to show
+            key: Frame content key (see FrameCache). A frame with the same
+                non-None key as the one on the panel is not uploaded again.
+                
+        Returns:
+            True if the frame was uploaded, False if it was skipped
+        """
+        if key is not None and key == self._shown:
+            return False
+        start = time.perf_counter()
+        self._back.SetImage(img, 0, 0)
+        SET_IMAGE_SECONDS.labels().observe(time.perf_counter() - start)
+        # SwapOnVSync hands back the previous front buffer to draw into next
+        self._back = self.matrix.SwapOnVSync(self._back)
+        self._shown = key
+        self.last_frame = img
+        if self.mirror is not None:
+            self.mirror.publish(img)
+        return True
+
+    def clear(self) -> None:
+        """Blank the panel."""
+        self._shown = None
+        self.last_frame = None
+        self.matrix.Clear()
+        if self.mirror is not None:
+            self.mirror.publish(None)
+
+    def close(self) -> None:
+        """Let headless backends flush their output."""
+        close = getattr(self.matrix, "close", None)
+        if close is not None:
+            close()
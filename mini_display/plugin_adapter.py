@@ -4,13 +4,36 @@ Plugin Adapter - Factory and registry for display plugins.
 
 This module implements the Adapter pattern to provide a unified interface
 for creating and managing display plugins.
+
+The registry holds "module:Class" references that are imported only when a
+plugin is created. Third-party packages can add plugins by declaring an
+entry point in the "mini_display.plugins" group, e.g. in pyproject.toml:
+
+    [project.entry-points."mini_display.plugins"]
+    stocks = "mini_display_stocks:StocksPlugin"
 """
 
-from typing import Dict, List, Type, Optional
+import importlib
+from typing import Any, Dict, List, Tuple, Type, Optional, Union
 
 from mini_display.plugin_base import Plugin
-from mini_display.plugins import ClockPlugin, WeatherPlugin, SubwayPlugin
-from mini_display.plugins.clock_plugin import TimezoneConfig
+
+ENTRY_POINT_GROUP = "mini_display.plugins"
+
+
+def _entry_points(group: str) -> list:
+    """Installed entry points in a group (empty if metadata is unavailable)."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    try:
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            return list(eps.select(group=group))
+        return list(eps.get(group, []))
+    except Exception:
+        return []
 
 
 class PluginAdapter:
@@ -21,29 +44,73 @@ class PluginAdapter:
     from the main display logic.
     """
     
-    # Plugin registry mapping plugin names to their classes
-    _registry: Dict[str, Type[Plugin]] = {
-        "clock": ClockPlugin,
-        "weather": WeatherPlugin,
-        "subway": SubwayPlugin,
+    # Plugin registry mapping plugin names to their classes, or to
+    # "module:Class" references not yet imported
+    _registry: Dict[str, Union[str, Type[Plugin]]] = {
+        "clock": "mini_display.plugins.clock_plugin:ClockPlugin",
+        "weather": "mini_display.plugins.weather_plugin:WeatherPlugin",
+        "subway": "mini_display.plugins.subway_plugin:SubwayPlugin",
     }
+    _discovered: bool = False
     
     @classmethod
-    def register_plugin(cls, name: str, plugin_class: Type[Plugin]) -> None:
+    def register_plugin(cls, name: str, plugin_class: Union[str, Type[Plugin]]) -> None:
         """
         Register a new plugin type.
         
         Args:
             name: Unique identifier for the plugin
-            plugin_class: Plugin class to register
+            plugin_class: Plugin class to register, or a "module:Class"
+                reference to import when the plugin is first created
         """
         cls._registry[name] = plugin_class
     
+    @classmethod
+    def _discover(cls) -> None:
+        """Add plugins declared through entry points, once.
+
+        Built-in and explicitly registered names take precedence.
+        """
+        if cls._discovered:
+            return
+        cls._discovered = True
+        for ep in _entry_points(ENTRY_POINT_GROUP):
+            cls._registry.setdefault(ep.name, ep.value)
+    
+    @staticmethod
+    def _load(ref: str) -> Type[Plugin]:
+        """Import the class named by a "module:Class" reference."""
+        module, _, attr = ref.partition(":")
+        obj = importlib.import_module(module)
+        for part in attr.split("."):
+            obj = getattr(obj, part)
+        return obj
+    
     @classmethod
     def get_available_plugins(cls) -> List[str]:
         """Get list of available plugin names."""
+        cls._discover()
         return list(cls._registry.keys())
     
+    @classmethod
+    def get_plugin_class(cls, name: str) -> Optional[Type[Plugin]]:
+        """
+        Resolve a plugin name to its class, importing its module if needed.
+        
+        Args:
+            name: Plugin name
+            
+        Returns:
+            Plugin class or None if no plugin has that name
+        """
+        if name not in cls._registry:
+            cls._discover()
+        plugin_class = cls._registry.get(name)
+        if isinstance(plugin_class, str):
+            plugin_class = cls._load(plugin_class)
+            cls._registry[name] = plugin_class
+        return plugin_class
+    
     @classmethod
     def create_plugin(cls, name: str, **kwargs) -> Optional[Plugin]:
         """
@@ -56,13 +123,13 @@ class PluginAdapter:
         Returns:
             Plugin instance or None if plugin not found
         """
-        plugin_class = cls._registry.get(name)
+        plugin_class = cls.get_plugin_class(name)
         if plugin_class is None:
             return None
         return plugin_class(**kwargs)
     
     @classmethod
-    def create_default_plugins(
+    def default_plugin_specs(
         cls,
         tz: Optional[str] = None,
         zip_code: str = "11201",
@@ -70,9 +137,9 @@ class PluginAdapter:
         lon: Optional[float] = None,
         stations: Optional[List[str]] = None,
         route_groups: Optional[List[str]] = None,
-    ) -> List[Plugin]:
+    ) -> List[Tuple[str, Dict[str, Any]]]:
         """
-        Create the default set of plugins with standard configuration.
+        Describe the default set of plugins without creating them.
         
         Args:
             tz: Timezone for clock plugin
@@ -83,42 +150,61 @@ class PluginAdapter:
             route_groups: List of subway routes to display
             
         Returns:
-            List of configured plugin instances
+            List of (plugin name, constructor arguments), in display order.
+            The arguments are picklable, so specs can be sent to worker
+            processes.
         """
-        plugins = []
+        specs: List[Tuple[str, Dict[str, Any]]] = []
         
         # Clock plugin - convert old tz parameter to new timezones format
         if tz:
+            from mini_display.plugins.clock_plugin import TimezoneConfig
+
             # If timezone is specified, use it for both cities
-            clock = cls.create_plugin(
-                "clock",
-                timezones=[
-                    TimezoneConfig(city="Local", timezone=tz),
-                ]
-            )
+            specs.append(("clock", {"timezones": [TimezoneConfig(city="Local", timezone=tz)]}))
         else:
             # Use default timezones (Melbourne and New York)
-            clock = cls.create_plugin("clock")
-        if clock:
-            plugins.append(clock)
+            specs.append(("clock", {}))
         
         # Subway plugin
-        subway = cls.create_plugin(
-            "subway",
-            stations=stations or ["Jay St-MetroTech"],
-            route_groups=route_groups or ["A", "C", "F", "R"]
-        )
-        if subway:
-            plugins.append(subway)
+        specs.append(("subway", {
+            "stations": stations or ["Jay St-MetroTech"],
+            "route_groups": route_groups or ["A", "C", "F", "R"],
+        }))
         
         # Weather plugin
-        weather = cls.create_plugin(
-            "weather",
-            zip_code=zip_code,
-            lat=lat,
-            lon=lon
-        )
-        if weather:
-            plugins.append(weather)
+        specs.append(("weather", {"zip_code": zip_code, "lat": lat, "lon": lon}))
         
-        return plugins
\ No newline at end of file
+        return specs
+    
+    @classmethod
+    def create_default_plugins(
+        cls,
+        tz: Optional[str] = None,
+        zip_code: str = "11201",
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        stations: Optional[List[str]] = None,
+        route_groups: Optional[List[str]] = None,
+    ) -> List[Plugin]:
+        """
+        Create the default set of plugins with standard configuration.
+        
+        Args:
+            tz: Timezone for clock plugin
+            zip_code: ZIP code for weather plugin
+            lat: Latitude for weather (overrides zip_code)
+            lon: Longitude for weather (overrides zip_code)
+            stations: List of subway stations to monitor
+            route_groups: List of subway routes to display
+            
+        Returns:
+            List of configured plugin instances
+        """
+        plugins = []
+        specs = cls.default_plugin_specs(tz, zip_code, lat, lon, stations, route_groups)
+        for name, kwargs in specs:
+            plugin = cls.create_plugin(name, **kwargs)
+            if plugin:
+                plugins.append(plugin)
+        return plugins
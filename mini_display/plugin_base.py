@@ -3,6 +3,8 @@
 Base plugin interface for mini display plugins.
 """
 
+from typing import Callable, Hashable, Optional, Tuple
+
 from PIL import Image
 
 
@@ -14,9 +16,60 @@ class Plugin:
         """Called periodically to update plugin state (e.g., fetch data)."""
         pass
     
+    def refresh_interval(self) -> Optional[float]:
+        """Seconds between background data refreshes.
+        
+        Plugins that fetch remote data return their refresh cadence here so the
+        fetch scheduler can call refresh() off the render thread. Plugins that
+        return None are ticked on the render thread instead.
+        """
+        return None
+    
+    def refresh(self) -> None:
+        """Fetch fresh data. Called from a background worker thread.
+        
+        Implementations must build new state locally and publish it with a
+        single attribute assignment, so render() only ever sees a complete
+        snapshot.
+        """
+        self.tick()
+    
+    def state_key(self) -> Optional[Hashable]:
+        """Cheap key identifying what render() would currently draw.
+        
+        Two calls returning equal keys must render identical frames, which
+        lets the display loop reuse the previous frame and skip uploading it.
+        Return None (the default) to always re-render.
+        """
+        return None
+    
+    def seconds_until_change(self) -> Optional[float]:
+        """Seconds until render() output is next due to change on its own.
+        
+        Lets the display loop sleep until exactly when a redraw is needed
+        (e.g. the next minute for a clock). None means no scheduled change.
+        """
+        return None
+    
+    def set_change_listener(self, listener: Optional[Callable[["Plugin"], None]]) -> None:
+        """Register the callback invoked by notify_changed()."""
+        self._change_listener = listener
+    
+    def notify_changed(self) -> None:
+        """Signal that new data is available and the display should redraw.
+        
+        Safe to call from any thread.
+        """
+        listener = getattr(self, "_change_listener", None)
+        if listener is not None:
+            listener(self)
+    
     def render(self, width: int, height: int) -> Image.Image:
         """Render the plugin's display content.
         
+        Plugins implement either render() or render_into(). The default
+        draws into a new image with render_into().
+        
         Args:
             width: Display width in pixels
             height: Display height in pixels
@@ -24,4 +77,28 @@ class Plugin:
         Returns:
             PIL Image with the rendered content
         """
-        raise NotImplementedError
\ No newline at end of file
+        if not uses_render_into(self):
+            raise NotImplementedError
+        img = Image.new("RGB", (width, height))
+        self.render_into(img, (0, 0, width, height))
+        return img
+    
+    def render_into(self, canvas: Image.Image, region: Tuple[int, int, int, int]) -> None:
+        """Draw the plugin's display content into part of an existing image.
+        
+        The canvas is reused between frames, so implementations must paint
+        every pixel of the region (background included) and nothing outside
+        it. The default pastes the result of render(), for plugins that
+        only implement that.
+        
+        Args:
+            canvas: RGB image to draw on
+            region: (left, top, right, bottom) box to fill
+        """
+        left, top, right, bottom = region
+        canvas.paste(self.render(right - left, bottom - top), (left, top))
+
+
+def uses_render_into(plugin: Plugin) -> bool:
+    """True if the plugin draws with its own render_into() rather than render()."""
+    return type(plugin).render_into is not Plugin.render_into
@@ -4,14 +4,34 @@ Mini Display Plugins Package
 
 This package contains individual plugin implementations for the mini display.
 Each plugin is in its own file following the adapter pattern.
+
+Plugin classes are imported on first access, so a plugin's dependencies are
+only loaded when it is used.
 """
 
-from mini_display.plugins.clock_plugin import ClockPlugin
-from mini_display.plugins.weather_plugin import WeatherPlugin
-from mini_display.plugins.subway_plugin import SubwayPlugin
+import importlib
+
+_EXPORTS = {
+    "ClockPlugin": "mini_display.plugins.clock_plugin",
+    "WeatherPlugin": "mini_display.plugins.weather_plugin",
+    "SubwayPlugin": "mini_display.plugins.subway_plugin",
+}
 
 __all__ = [
     "ClockPlugin",
     "WeatherPlugin",
     "SubwayPlugin",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
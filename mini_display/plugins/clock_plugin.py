@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 Clock Plugin - displays time and date for multiple timezones.
+
+The output only changes once a minute, so frames are rendered once per
+minute and kept; the next minute's frame is pre-rendered in the background
+shortly before the boundary.
 """
 
 import dataclasses
+import threading
+import time
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
 from mini_display.plugin_base import Plugin
-from mini_display.utils import draw_text, measure_text
+from mini_display.utils import LRUCache, draw_text, measure_text, get_font
 
 try:
     from zoneinfo import ZoneInfo
@@ -35,31 +41,94 @@ class ClockPlugin(Plugin):
     fg_datetime: Tuple[int, int, int] = (128, 128, 128)
     fg_separator: Tuple[int, int, int] = (64, 64, 64)
     bg: Tuple[int, int, int] = (0, 0, 0)
+    prerender_lead_sec: float = 2.0
+    _zones: list = dataclasses.field(default_factory=list)
+    _frames: Optional[LRUCache] = None
+    # Minute whose pre-render is armed, per frame size; a clock shown in
+    # several regions is pre-rendered at each size
+    _prerender_minutes: Dict[Tuple[int, int], int] = dataclasses.field(default_factory=dict)
+    _lock: Optional[threading.Lock] = None
 
     def __post_init__(self):
-        """Initialize default timezones if none provided."""
+        """Initialize default timezones if none provided and load zones once."""
         if self.timezones is None:
             self.timezones = [
                 TimezoneConfig(city="Melbourne", timezone="Australia/Melbourne"),
                 TimezoneConfig(city="New York", timezone="America/New_York"),
             ]
+        self._zones = [self._load_zone(tz.timezone) for tz in self.timezones]
+        self._frames = LRUCache(4)
+        self._lock = threading.Lock()
 
-    def _get_time_for_tz(self, timezone: str) -> datetime:
-        """Get current time in specified timezone."""
+    @staticmethod
+    def _load_zone(timezone: str):
+        """Load a ZoneInfo, or None to fall back to local time."""
         if ZoneInfo:
             try:
-                return datetime.now(ZoneInfo(timezone))
+                return ZoneInfo(timezone)
             except Exception:
                 pass
-        return datetime.now()
+        return None
+
+    @staticmethod
+    def _time_in_zone(ts: float, zone) -> datetime:
+        """Convert a timestamp to the given zone (local time if None)."""
+        if zone is not None:
+            return datetime.fromtimestamp(ts, zone)
+        return datetime.fromtimestamp(ts)
+
+    def state_key(self) -> int:
+        """The display only changes once a minute."""
+        return int(time.time() // 60)
+
+    def seconds_until_change(self) -> float:
+        """Redraw at the top of the next minute."""
+        return 60.0 - (time.time() % 60.0)
+
+    def render_into(self, canvas: Image.Image, region: Tuple[int, int, int, int]) -> None:
+        """Copy this minute's frame into the region.
+
+        Frames are still drawn on their own image (and pre-rendered ahead
+        of the minute), so text never spills outside the region.
+        """
+        left, top, right, bottom = region
+        canvas.paste(self.render(right - left, bottom - top), (left, top))
 
     def render(self, width: int, height: int) -> Image.Image:
-        """Render multiple timezone displays with separators."""
+        """Return this minute's frame, rendering it only if not already cached."""
+        minute = int(time.time() // 60)
+        key = (minute, width, height)
+        img = self._frames.get(key)
+        if img is None:
+            img = self._draw(minute * 60, width, height)
+            self._frames.put(key, img)
+        self._schedule_prerender(minute + 1, width, height)
+        return img
+
+    def _schedule_prerender(self, minute: int, width: int, height: int) -> None:
+        """Arrange for a minute's frame to be rendered just before it is due."""
+        with self._lock:
+            if self._prerender_minutes.get((width, height)) == minute:
+                return
+            self._prerender_minutes[(width, height)] = minute
+        delay = max(0.0, minute * 60 - self.prerender_lead_sec - time.time())
+        timer = threading.Timer(delay, self._prerender, args=(minute, width, height))
+        timer.daemon = True
+        timer.start()
+
+    def _prerender(self, minute: int, width: int, height: int) -> None:
+        """Background job: render a future minute's frame into the cache."""
+        key = (minute, width, height)
+        if self._frames.get(key) is None:
+            self._frames.put(key, self._draw(minute * 60, width, height))
+
+    def _draw(self, ts: float, width: int, height: int) -> Image.Image:
+        """Render multiple timezone displays with separators for a given time."""
         img = Image.new("RGB", (width, height), self.bg)
         d = ImageDraw.Draw(img)
         
         # Use PIL's default font which supports all characters
-        font = ImageFont.load_default()
+        font = get_font()
         
         # Calculate line height
         _, line_height = measure_text("A", font)
@@ -70,8 +139,8 @@ class ClockPlugin(Plugin):
         y += 2
         
         # Draw each timezone
-        for tz_config in self.timezones:
-            now = self._get_time_for_tz(tz_config.timezone)
+        for tz_config, zone in zip(self.timezones, self._zones):
+            now = self._time_in_zone(ts, zone)
             
             # Format: "mm/dd/yy at hh:mm am/pm"
             date_str = now.strftime("%m/%d/%y")
@@ -90,4 +159,4 @@ class ClockPlugin(Plugin):
         # Draw bottom separator line
         d.line([(0, height - 1), (width - 1, height - 1)], fill=self.fg_separator)
         
-        return img
\ No newline at end of file
+        return img
@@ -3,21 +3,32 @@
 Subway Plugin - displays NYC MTA subway arrival times.
 """
 
+import bisect
+import csv
 import dataclasses
+import importlib.util
+import math
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as _dt
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
+from mini_display.arrivals import ArrivalStore, packed_time, unpack
+from mini_display.gtfs_stream import iter_arrivals
+from mini_display.http_cache import get_session
+from mini_display.metrics import track_fetch
 from mini_display.plugin_base import Plugin
-from mini_display.utils import draw_text, measure_text, center_x
+from mini_display.utils import draw_text, measure_text, center_x, get_font
 
-try:
-    from nyct_gtfs import NYCTFeed
-except Exception as e:
+# nyct_gtfs (and protobuf behind it) is only imported by the "nyct" decoder;
+# locating it here keeps the install check without paying for the import.
+_NYCT_GTFS = importlib.util.find_spec("nyct_gtfs")
+if _NYCT_GTFS is None:
     print("Error: nyct-gtfs missing. Install with 'pip install nyct-gtfs protobuf'.")
-    raise
+    raise ImportError("No module named 'nyct_gtfs'")
 
 
 # MTA official line colors
@@ -47,6 +58,28 @@ MTA_COLORS: Dict[str, Tuple[int, int, int]] = {
     "S": (128, 128, 128),
 }
 
+# Most arrival lines drawn, whatever max_lines asks for
+_DRAWN_LINES = 2
+
+# Arrivals kept per station and direction beyond the lines shown, so the
+# display can move up to the next train as trains depart between fetches
+_SPARE_ARRIVALS = 4
+
+
+_FEED_BASE = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs"
+
+# GTFS-RT feed URL serving each route. Several routes share one feed.
+ROUTE_FEEDS: Dict[str, str] = {
+    **{r: _FEED_BASE for r in ("1", "2", "3", "4", "5", "6", "7", "S", "GS")},
+    **{r: _FEED_BASE + "-ace" for r in ("A", "C", "E", "H", "SR")},
+    **{r: _FEED_BASE + "-bdfm" for r in ("B", "D", "F", "M", "FS", "SF")},
+    "G": _FEED_BASE + "-g",
+    **{r: _FEED_BASE + "-jz" for r in ("J", "Z")},
+    **{r: _FEED_BASE + "-nqrw" for r in ("N", "Q", "R", "W")},
+    "L": _FEED_BASE + "-l",
+    **{r: _FEED_BASE + "-si" for r in ("SI", "SIR")},
+}
+
 
 @dataclasses.dataclass
 class SubwayPlugin(Plugin):
@@ -58,80 +91,237 @@ class SubwayPlugin(Plugin):
     bg: Tuple[int, int, int] = (0, 0, 0)
     text_fg_default: Tuple[int, int, int] = (255, 255, 255)
     max_lines: int = 2
+    stops_txt: Optional[str] = None
+    # "stream" decodes only matching trips straight from the protobuf bytes;
+    # "nyct" builds the full nyct_gtfs object model for each feed.
+    decoder: str = "stream"
     _cache_ttl_sec: int = 20
     _last_fetch_ts: float = 0.0
-    _lines: List[Tuple[str, Tuple[int, int, int]]] = dataclasses.field(default_factory=list)
+    # Upcoming arrivals as packed records (see mini_display.arrivals) sorted
+    # by time; countdowns are computed from these when drawing, so they stay
+    # correct between fetches
+    _arrivals: List[int] = dataclasses.field(default_factory=list)
+    _fetched: bool = False
+    _routes: List[str] = dataclasses.field(default_factory=list)
+    _station_keys: List[str] = dataclasses.field(default_factory=list)
+    _stop_ids: Set[str] = dataclasses.field(default_factory=set)
+    # Stop ID -> index of the configured station it belongs to
+    _stop_station: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+    def __post_init__(self):
+        """Resolve configured station names to GTFS stop IDs once."""
+        self._routes = list(dict.fromkeys(r.upper() for r in self.route_groups))
+        self._station_keys = [self._norm(st) for st in self.stations]
+        self._stop_station = self._resolve_stop_ids()
+        self._stop_ids = set(self._stop_station)
 
     @staticmethod
     def _norm(s: str) -> str:
         """Normalize station name for comparison."""
         return "".join(ch for ch in s.lower() if ch.isalnum())
 
-    def _want_station(self, stop_name: str) -> bool:
-        """Check if stop matches any configured stations."""
+    def _resolve_stop_ids(self) -> Dict[str, int]:
+        """Map stop IDs, with N/S suffixes, to configured stations from static GTFS stops."""
+        path = self.stops_txt or os.path.join(
+            os.path.dirname(_NYCT_GTFS.origin), "gtfs_static", "stops.txt"
+        )
+        ids: Dict[str, int] = {}
+        try:
+            with open(path, newline="", encoding="utf-8") as fp:
+                for row in csv.DictReader(fp):
+                    station = self._station_of(row.get("stop_name") or "")
+                    if station is None:
+                        continue
+                    stop_id = row["stop_id"]
+                    ids[stop_id] = station
+                    if row.get("location_type") == "1":
+                        ids[stop_id + "N"] = station
+                        ids[stop_id + "S"] = station
+        except Exception:
+            return {}
+        return ids
+
+    def _station_of(self, stop_name: str) -> Optional[int]:
+        """Index of the first configured station the stop matches, if any."""
         n = self._norm(stop_name)
-        for st in self.stations:
-            if self._norm(st) in n:
-                return True
-        return False
+        for i, key in enumerate(self._station_keys):
+            if key in n:
+                return i
+        return None
 
-    def _fetch(self) -> None:
-        """Fetch next arrivals from MTA GTFS feeds."""
-        now = _dt.now()
-        results: List[Tuple[_dt, str, Tuple[int, int, int]]] = []
-        
+    def _stop_station_of(self, stu) -> Optional[int]:
+        """Configured station a stop time update is at, if any.
+
+        Uses the precomputed stop-ID index, falling back to name matching
+        when the static stop data could not be resolved.
+        """
+        if self._stop_station:
+            return self._stop_station.get(stu.stop_id)
+        nm = getattr(stu, "stop_name", None)
+        return self._station_of(nm) if nm else None
+
+    def _new_store(self) -> ArrivalStore:
+        """Empty arrival store sized for the configured lines."""
+        return ArrivalStore(self._routes, max(1, self.max_lines) + _SPARE_ARRIVALS)
+
+    def _feed_groups(self) -> Dict[str, List[str]]:
+        """Group configured routes by the feed URL that serves them."""
+        groups: Dict[str, List[str]] = {}
         for route in self.route_groups:
-            try:
-                feed = NYCTFeed(route)
-                trains = feed.filter_trips(line_id=route)
-                for t in trains:
-                    for stu in t.stop_time_updates:
-                        nm = getattr(stu, "stop_name", None)
-                        if not nm or not self._want_station(nm):
-                            continue
-                        arr = getattr(stu, "arrival", None) or getattr(stu, "departure", None)
-                        if not isinstance(arr, _dt) or arr < now:
-                            continue
-                        mins = int((arr - now).total_seconds() // 60)
-                        arrow = "↑" if t.direction == "N" else "↓"
-                        label = f"{route} {mins}{arrow}"
-                        color = MTA_COLORS.get(route.upper(), self.text_fg_default)
-                        results.append((arr, label, color))
-                        break
-            except Exception:
+            url = ROUTE_FEEDS.get(route.upper())
+            if url is None:
                 continue
-        
-        results.sort(key=lambda x: x[0])
-        top = results[:max(1, self.max_lines)]
-        if not top:
-            self._lines = [("MTA N/A", self.text_fg_default)]
-        else:
-            self._lines = [(lab, col) for _, lab, col in top]
+            routes = groups.setdefault(url, [])
+            if route.upper() not in routes:
+                routes.append(route.upper())
+        return groups
+
+    def _fetch_feed(self, url: str, routes: List[str], now: _dt) -> ArrivalStore:
+        """Download one feed and collect arrivals for every route it serves.
+
+        The streaming decoder needs the stop-ID index; without it the
+        nyct_gtfs path (which can match on stop names) is used.
+        """
+        if self.decoder == "stream" and self._stop_ids:
+            return self._fetch_feed_stream(url, routes, now)
+        return self._fetch_feed_nyct(url, routes, now)
+
+    def _fetch_feed_stream(self, url: str, routes: List[str], now: _dt) -> ArrivalStore:
+        """Download one feed and decode only the matching trip updates."""
+        store = self._new_store()
+        try:
+            with track_fetch(self.name):
+                r = get_session().get(url, timeout=10)
+                r.raise_for_status()
+            not_before = math.ceil(now.timestamp())
+            for route, direction, stop_id, ts in iter_arrivals(r.content, set(routes), self._stop_ids, not_before):
+                store.add(self._stop_station.get(stop_id, 0), route, direction, ts)
+        except Exception:
+            pass
+        return store
+
+    def _fetch_feed_nyct(self, url: str, routes: List[str], now: _dt) -> ArrivalStore:
+        """Download one feed and walk its nyct_gtfs trip objects.
+
+        The bytes are fetched over the pooled session, with a timeout,
+        rather than by nyct_gtfs itself.
+        """
+        from nyct_gtfs import NYCTFeed
+
+        store = self._new_store()
+        try:
+            with track_fetch(self.name):
+                r = get_session().get(url, timeout=10)
+                r.raise_for_status()
+            feed = NYCTFeed(url, fetch_immediately=False)
+            feed.load_gtfs_bytes(r.content)
+            for t in feed.filter_trips(line_id=routes):
+                route = t.route_id
+                for stu in t.stop_time_updates:
+                    station = self._stop_station_of(stu)
+                    if station is None:
+                        continue
+                    arr = getattr(stu, "arrival", None) or getattr(stu, "departure", None)
+                    if not isinstance(arr, _dt) or arr < now:
+                        continue
+                    store.add(station, route, t.direction, math.ceil(arr.timestamp()))
+                    break
+        except Exception:
+            pass
+        return store
+
+    def _fetch(self) -> None:
+        """Fetch next arrivals from MTA GTFS feeds.
+
+        Each distinct feed is downloaded once per cycle, concurrently, and
+        filtered for all of the configured routes it serves.
+        """
+        now = _dt.now()
+        store = self._new_store()
+
+        groups = self._feed_groups()
+        if groups:
+            with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                futures = [
+                    pool.submit(self._fetch_feed, url, routes, now)
+                    for url, routes in groups.items()
+                ]
+                for fut in futures:
+                    store.update(fut.result())
+
+        self._arrivals = store.timeline()
+        self._fetched = True
+
+    def _upcoming(self, now: float) -> List[Tuple[int, int, str]]:
+        """(epoch, route index, direction) of the arrivals drawn at time now.
+
+        Trains already departed drop out. Only the lines render_into() draws
+        are returned, so countdowns that are never shown do not change the
+        state key or schedule redraws.
+        """
+        arrivals = self._arrivals
+        i = bisect.bisect_left(arrivals, packed_time(math.ceil(now)))
+        shown = min(max(1, self.max_lines), _DRAWN_LINES)
+        return [unpack(r) for r in arrivals[i:i + shown]]
+
+    def _lines(self, now: float) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """Countdown labels and line colors as of time now."""
+        upcoming = self._upcoming(now)
+        if not upcoming:
+            return [("MTA N/A" if self._fetched else "MTA ...", self.text_fg_default)]
+        lines = []
+        for ts, idx, direction in upcoming:
+            route = self._routes[idx]
+            mins = int((ts - now) // 60)
+            arrow = "↑" if direction == "N" else "↓"
+            lines.append((f"{route} {mins}{arrow}", MTA_COLORS.get(route.upper(), self.text_fg_default)))
+        return lines
+
+    def refresh_interval(self) -> float:
+        """Refresh on the feed cache TTL."""
+        return float(self._cache_ttl_sec)
+
+    def refresh(self) -> None:
+        """Fetch arrivals unconditionally and publish them."""
+        self._fetch()
+        self._last_fetch_ts = time.time()
 
     def tick(self) -> None:
         """Update subway data if cache expired."""
+        if time.time() - self._last_fetch_ts > self._cache_ttl_sec:
+            self.refresh()
+
+    def state_key(self) -> tuple:
+        """The display only shows the arrival lines."""
+        return tuple(self._lines(time.time()))
+
+    def seconds_until_change(self) -> Optional[float]:
+        """Redraw when the next shown countdown ticks down or its train departs."""
         now = time.time()
-        if now - self._last_fetch_ts > self._cache_ttl_sec:
-            self._fetch()
-            self._last_fetch_ts = now
+        upcoming = self._upcoming(now)
+        if not upcoming:
+            return None
+        # A countdown changes just after (ts - now) crosses a multiple of 60
+        return min((ts - now) % 60.0 for ts, _, _ in upcoming) + 0.01
 
-    def render(self, width: int, height: int) -> Image.Image:
-        """Render arrival times with MTA line colors."""
-        img = Image.new("RGB", (width, height), self.bg)
-        d = ImageDraw.Draw(img)
-        font = ImageFont.load_default()
-        lines = self._lines or [("MTA ...", self.text_fg_default)]
+    def render_into(self, canvas: Image.Image, region: Tuple[int, int, int, int]) -> None:
+        """Render arrival times with MTA line colors into the region."""
+        left, top, right, bottom = region
+        width, height = right - left, bottom - top
+        canvas.paste(self.bg, region)
+        d = ImageDraw.Draw(canvas)
+        font = get_font()
+        lines = self._lines(time.time())
 
         y = 0
         used = 0
-        for text, color in lines[:2]:
+        for text, color in lines:
             w, h = measure_text(text, font)
             if used + h > height:
                 break
             x = center_x(width, w)
-            draw_text(d, x, y, text, color, font)
+            draw_text(d, left + x, top + y, text, color, font)
             y += h
             if y + 1 < height:
                 y += 1
-            used = y
-        return img
\ No newline at end of file
+            used = y
\ No newline at end of file
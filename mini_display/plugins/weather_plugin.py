@@ -1,17 +1,70 @@
 #!/usr/bin/env python3
 """
-Weather Plugin - displays temperature in Celsius from NWS forecast.
+Weather Plugin - displays temperature in Celsius from the NWS hourly forecast.
+
+The hourly forecast series is fetched once and kept as compact arrays; each
+tick picks the current hour's value locally. The series is only re-fetched
+when it runs short or the cached response expires.
+
+Geocode results and the NWS gridpoint forecast URLs never change for a given
+location, so they are persisted on disk. The forecast itself goes through a
+revalidating HTTP cache on the shared pooled session.
 """
 
 import dataclasses
+import os
 import time
-from typing import Optional, Tuple
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 import requests
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
+from mini_display.http_cache import DiskStore, HttpCache, default_cache_dir, get_session
+from mini_display.metrics import track_fetch
 from mini_display.plugin_base import Plugin
-from mini_display.utils import draw_text, measure_text, center_x
+from mini_display.utils import draw_text, measure_text, center_x, get_font
+
+
+def _to_celsius(period: dict) -> int:
+    """Temperature of a forecast period in whole degrees Celsius."""
+    temp = period["temperature"]
+    unit = period.get("temperatureUnit") or "F"
+    if isinstance(temp, dict):
+        unit = "C" if str(temp.get("unitCode", "")).endswith("degC") else "F"
+        temp = temp["value"]
+    f = float(temp)
+    if unit.upper() == "F":
+        return round((f - 32.0) * 5.0 / 9.0)
+    return int(round(f))
+
+
+class HourlySeries:
+    """Hourly temperatures as parallel arrays of period bounds and degrees C."""
+    __slots__ = ("starts", "ends", "temps_c", "expires")
+
+    def __init__(self, periods: List[dict], expires: float):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.temps_c = array("h")
+        self.expires = expires
+        for p in periods:
+            self.starts.append(datetime.fromisoformat(p["startTime"]).timestamp())
+            self.ends.append(datetime.fromisoformat(p["endTime"]).timestamp())
+            self.temps_c.append(_to_celsius(p))
+
+    def temp_at(self, ts: float) -> Optional[int]:
+        """Temperature for the period covering ts, or None if not covered."""
+        i = bisect_right(self.starts, ts) - 1
+        if i < 0 or ts >= self.ends[i]:
+            return None
+        return self.temps_c[i]
+
+    def remaining(self, ts: float) -> float:
+        """Seconds of forecast left after ts."""
+        return self.ends[-1] - ts if self.ends else 0.0
 
 
 @dataclasses.dataclass
@@ -25,58 +78,130 @@ class WeatherPlugin(Plugin):
     fg_temp: Tuple[int, int, int] = (0, 200, 255)
     bg: Tuple[int, int, int] = (0, 0, 0)
     user_agent: str = "mini-display/1.0 (contact: you@example.com)"
-    _last_fetch_ts: float = 0.0
-    _cache_ttl_sec: int = 300
+    cache_dir: Optional[str] = None
+    _select_interval_sec: int = 60
+    _min_horizon_sec: int = 3 * 3600
+    _hourly_ttl_sec: int = 3600
+    _retry_sec: int = 300
+    _retry_at: float = 0.0
+    _series: Optional[HourlySeries] = None
     _temp_c_text: str = "N/A"
+    _http: Optional[HttpCache] = None
+    _lookups: Optional[DiskStore] = None
+
+    def __post_init__(self):
+        """Open the persistent lookup and HTTP caches."""
+        cache_dir = self.cache_dir or default_cache_dir()
+        self._http = HttpCache(os.path.join(cache_dir, "weather-http.json"))
+        self._lookups = DiskStore(os.path.join(cache_dir, "weather-lookups.json"))
 
     def _geocode_zip(self, z: str) -> Tuple[float, float]:
         """Convert ZIP code to lat/lon coordinates."""
         if self.lat is not None and self.lon is not None:
             return (self.lat, self.lon)
+        key = f"geocode:{z}"
+        cached = self._lookups.get(key)
+        if cached:
+            return (float(cached[0]), float(cached[1]))
         try:
-            r = requests.get(f"https://api.zippopotam.us/us/{z}", timeout=5)
+            r = get_session().get(f"https://api.zippopotam.us/us/{z}", timeout=5)
             if r.ok:
                 js = r.json()
                 p = js["places"][0]
-                return (float(p["latitude"]), float(p["longitude"]))
+                latlon = (float(p["latitude"]), float(p["longitude"]))
+                self._lookups.set(key, list(latlon))
+                return latlon
         except Exception:
             pass
         return (40.6944, -73.9918)  # Default: Brooklyn
 
+    def _forecast_urls(self, lat: float, lon: float, headers: dict) -> Dict[str, str]:
+        """Resolve the gridpoint forecast URLs for a location, once."""
+        key = f"nws:{lat},{lon}"
+        urls = self._lookups.get(key)
+        if urls:
+            return urls
+        pt = self._http.get(f"https://api.weather.gov/points/{lat},{lon}", headers=headers, timeout=6)
+        props = pt.json()["properties"]
+        urls = {"forecast": props["forecast"], "forecastHourly": props["forecastHourly"]}
+        self._lookups.set(key, urls)
+        return urls
+
     def _fetch(self) -> None:
-        """Fetch current temperature from NWS API."""
+        """Fetch the hourly forecast series from NWS API.
+        
+        On failure the previous series is kept (it may still cover the next
+        few hours) and the fetch is retried after _retry_sec.
+        """
         lat, lon = self._geocode_zip(self.zip_code)
         headers = {"User-Agent": self.user_agent, "Accept": "application/geo+json"}
+        now = time.time()
         try:
-            pt = requests.get(f"https://api.weather.gov/points/{lat},{lon}", headers=headers, timeout=6)
-            pt.raise_for_status()
-            fx_url = pt.json()["properties"]["forecast"]
-            fx = requests.get(fx_url, headers=headers, timeout=6)
-            fx.raise_for_status()
-            first = fx.json()["properties"]["periods"][0]
-            f = float(first["temperature"])
-            if first["temperatureUnit"].upper() == "F":
-                c = round((f - 32.0) * 5.0 / 9.0)
+            with track_fetch(self.name):
+                urls = self._forecast_urls(lat, lon, headers)
+                try:
+                    fx = self._http.get(urls["forecastHourly"], headers=headers, timeout=6)
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code in (404, 410):
+                        # The gridpoint was reassigned; rediscover it next time
+                        self._lookups.delete(f"nws:{lat},{lon}")
+                    raise
+            fetched = time.time()
+            if fx.stale:
+                # NWS is unreachable; use the old series but try again soon
+                expires = fetched + self._retry_sec
+                self._retry_at = expires
+            elif fx.expires > fetched:
+                expires = fx.expires
             else:
-                c = int(round(f))
-            self._temp_c_text = f"{c}°C"
+                expires = fetched + self._hourly_ttl_sec
+            self._series = HourlySeries(fx.json()["properties"]["periods"], expires)
         except Exception:
-            self._temp_c_text = "N/A"
+            self._retry_at = now + self._retry_sec
 
-    def tick(self) -> None:
-        """Update weather data if cache expired."""
-        now = time.time()
-        if now - self._last_fetch_ts > self._cache_ttl_sec:
+    def _needs_fetch(self, now: float) -> bool:
+        """True when the series is missing, expired or running short."""
+        if now < self._retry_at:
+            return False
+        series = self._series
+        return (
+            series is None
+            or now >= series.expires
+            or series.remaining(now) < self._min_horizon_sec
+        )
+
+    def _select(self, now: float) -> None:
+        """Publish the current hour's temperature from the cached series."""
+        series = self._series
+        c = series.temp_at(now) if series is not None else None
+        self._temp_c_text = "N/A" if c is None else f"{c}°C"
+
+    def refresh_interval(self) -> float:
+        """Re-pick the current hour every minute; fetches happen only as needed."""
+        return float(self._select_interval_sec)
+
+    def refresh(self) -> None:
+        """Fetch the series if needed, then pick the current hour."""
+        if self._needs_fetch(time.time()):
             self._fetch()
-            self._last_fetch_ts = now
+        self._select(time.time())
+
+    def tick(self) -> None:
+        """Update the displayed temperature for the current hour."""
+        self.refresh()
+
+    def state_key(self) -> str:
+        """The display only shows the temperature text."""
+        return self._temp_c_text
 
-    def render(self, width: int, height: int) -> Image.Image:
-        """Render temperature centered on display."""
-        img = Image.new("RGB", (width, height), self.bg)
-        d = ImageDraw.Draw(img)
-        font = ImageFont.load_default()
+    def render_into(self, canvas: Image.Image, region: Tuple[int, int, int, int]) -> None:
+        """Render temperature centered in the region."""
+        left, top, right, bottom = region
+        width, height = right - left, bottom - top
+        canvas.paste(self.bg, region)
+        d = ImageDraw.Draw(canvas)
+        font = get_font()
         w, h = measure_text(self._temp_c_text, font)
         x = center_x(width, w)
         y = (height - h) // 2
-        draw_text(d, x, y, self._temp_c_text, self.fg_temp, font)
-        return img
\ No newline at end of file
+        draw_text(d, left + x, top + y, self._temp_c_text, self.fg_temp, font)
\ No newline at end of file
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Profiling - run the display loop under cProfile and summarize it by stage.
+
+`mini-display --profile out.pstats` runs the normal plugin rotation on the
+configured backend for a number of cycles (or seconds), writes the raw
+pstats file for offline inspection (python -m pstats, snakeviz) and prints a
+per-stage breakdown: plugin tick, plugin render, text layout and image
+upload.
+
+cProfile only sees the thread it runs on, so while profiling the fetch
+scheduler is not started and plugins are ticked on the loop thread; their
+fetches then show up under the tick stage. A region compositor likewise
+draws its regions one after another on the loop thread.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from mini_display.loop import DisplayLoop
+from mini_display.utils import GlyphAtlas, draw_text, measure_text
+
+# pstats function key: (filename, line number, function name)
+FuncKey = Tuple[str, int, str]
+
+STAGES = ("tick", "render", "text layout", "image upload")
+
+
+def _key(fn) -> Optional[FuncKey]:
+    """pstats key of a Python function, or None for builtins."""
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        return None
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _is_set_image(key: FuncKey) -> bool:
+    """Match SetImage whether implemented in Python or in the rgbmatrix extension."""
+    name = key[2]
+    return name == "SetImage" or "'SetImage'" in name
+
+
+def stage_functions(plugins) -> Dict[str, Callable[[FuncKey], bool]]:
+    """Predicates selecting the profiled functions that make up each stage."""
+    tick: Set[FuncKey] = set()
+    render: Set[FuncKey] = set()
+    for plugin in plugins:
+        cls = type(plugin)
+        tick.update(k for k in (_key(cls.tick), _key(cls.refresh)) if k)
+        render.update(k for k in (_key(cls.render), _key(cls.render_into)) if k)
+    text = {k for k in map(_key, (draw_text, measure_text, GlyphAtlas.draw, GlyphAtlas.glyph)) if k}
+    return {
+        "tick": tick.__contains__,
+        "render": render.__contains__,
+        "text layout": text.__contains__,
+        "image upload": _is_set_image,
+    }
+
+
+def _descendants(stats: pstats.Stats, wanted: Callable[[FuncKey], bool]) -> Set[FuncKey]:
+    """Functions called, directly or indirectly, from functions in a stage."""
+    callees: Dict[FuncKey, Set[FuncKey]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.stats.items():
+        for caller in callers:
+            callees.setdefault(caller, set()).add(func)
+    seen: Set[FuncKey] = set()
+    pending = [func for func in stats.stats if wanted(func)]
+    while pending:
+        for callee in callees.get(pending.pop(), ()):
+            if callee not in seen:
+                seen.add(callee)
+                pending.append(callee)
+    return seen
+
+
+def stage_breakdown(stats: pstats.Stats, plugins) -> Dict[str, Tuple[int, float]]:
+    """
+    Time spent in each stage.
+
+    A stage's time is the cumulative time of calls entering it from outside,
+    so nested calls within a stage (draw_text -> measure_text, tick ->
+    refresh, draw_text -> get_atlas -> GlyphAtlas.glyph) are not counted
+    twice. pstats only records direct callers, so a call is taken to be
+    inside a stage when its caller is in the stage or is itself called from
+    it. Stages nest in each other: render includes text layout.
+
+    Returns:
+        Stage name -> (calls, seconds)
+    """
+    result: Dict[str, Tuple[int, float]] = {}
+    for stage, wanted in stage_functions(plugins).items():
+        inside = _descendants(stats, wanted)
+        calls, seconds = 0, 0.0
+        for func, (_cc, nc, _tt, ct, callers) in stats.stats.items():
+            if not wanted(func):
+                continue
+            if not callers:
+                calls += nc
+                seconds += ct
+                continue
+            for caller, info in callers.items():
+                if not wanted(caller) and caller not in inside:
+                    calls += info[0]
+                    seconds += info[3]
+        result[stage] = (calls, seconds)
+    return result
+
+
+def format_report(breakdown: Dict[str, Tuple[int, float]], wall: float, stats: pstats.Stats, top: int = 15) -> str:
+    """Render the stage breakdown followed by the top functions by cumulative time."""
+    lines = [
+        f"Profiled {wall:.2f} s of display loop",
+        "",
+        f"{'stage':<14} {'calls':>8} {'total s':>10} {'ms/call':>10} {'% wall':>8}",
+    ]
+    for stage in STAGES:
+        calls, seconds = breakdown.get(stage, (0, 0.0))
+        per_call = seconds * 1000.0 / calls if calls else 0.0
+        share = 100.0 * seconds / wall if wall > 0 else 0.0
+        lines.append(f"{stage:<14} {calls:>8} {seconds:>10.4f} {per_call:>10.3f} {share:>7.1f}%")
+    lines.append("")
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(top)
+    lines.append(out.getvalue().strip())
+    return "\n".join(lines) + "\n"
+
+
+def profile_loop(
+    loop: DisplayLoop,
+    path: str,
+    cycles: Optional[int] = None,
+    seconds: Optional[float] = None,
+) -> str:
+    """
+    Run a display loop under cProfile and write the results.
+
+    Args:
+        loop: Loop (DisplayLoop or CompositorLoop) to run; it should not
+            have a running fetch scheduler
+        path: pstats output file; the text report is written next to it
+            with a .txt suffix
+        cycles: Stop after this many full rotations through the plugins
+        seconds: Stop after this many seconds (takes precedence over cycles)
+
+    Returns:
+        The text report
+    """
+    timer = None
+    max_slots = None
+    if seconds is not None:
+        timer = threading.Timer(seconds, loop.stop)
+        timer.daemon = True
+    else:
+        max_slots = max(1, cycles or 1) * len(loop.plugins)
+
+    if hasattr(loop, "concurrent"):
+        loop.concurrent = False
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    if timer is not None:
+        timer.start()
+    profiler.enable()
+    try:
+        loop.run(max_slots=max_slots)
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - start
+        if timer is not None:
+            timer.cancel()
+
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler)
+    report = format_report(stage_breakdown(stats, loop.plugins), wall, stats)
+    with open(path + ".txt", "w", encoding="utf-8") as fp:
+        fp.write(report)
+    return report
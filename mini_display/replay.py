@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Replay harness - record upstream responses and serve them from a local stand-in.
+
+`mini-display record DIR` fetches the MTA GTFS-RT feeds, the zippopotam.us
+geocode and the NWS forecasts the built-in plugins use and saves them as a
+fixture store. `mini-display replay DIR` serves a store over HTTP, adding
+latency, errors and timeouts on request, and `mini-display --upstream URL`
+points the display (including isolated workers) at it:
+
+    mini-display replay fixtures --port 8765 --latency 0.3 --error-rate 0.05 &
+    mini-display --backend null --upstream http://127.0.0.1:8765 --metrics-port 9100
+
+The stand-in serves https://HOST/PATH as /HOST/PATH. By default replayed
+responses are moved forward in time by however long ago they were recorded,
+so a soak run of any length keeps seeing upcoming trains and a current
+forecast.
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from requests.structures import CaseInsensitiveDict
+
+from mini_display.fixtures import Fixture, FixtureStore, record_fixtures, synthetic_fixtures
+
+# JSON keys holding timestamps in NWS responses
+_JSON_TIME_KEYS = ("startTime", "endTime", "generatedAt", "updateTime", "updated")
+
+# Retimed bodies are reused while the offset stays within one step
+_RETIME_STEP_SEC = 10
+
+
+def _retime_gtfs(body: bytes, offset: int) -> bytes:
+    """Shift every timestamp in a serialized GTFS-RT FeedMessage."""
+    from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2, nyct_subway_pb2  # noqa: F401 (registers extensions)
+
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(body)
+    if feed.header.timestamp:
+        feed.header.timestamp += offset
+    for entity in feed.entity:
+        if entity.HasField("trip_update"):
+            tu = entity.trip_update
+            if tu.timestamp:
+                tu.timestamp += offset
+            for stu in tu.stop_time_update:
+                if stu.arrival.time:
+                    stu.arrival.time += offset
+                if stu.departure.time:
+                    stu.departure.time += offset
+        if entity.HasField("vehicle") and entity.vehicle.timestamp:
+            entity.vehicle.timestamp += offset
+    return feed.SerializeToString()
+
+
+def _retime_json(value, offset: timedelta):
+    """Shift ISO timestamps under the known time keys of a JSON document."""
+    if isinstance(value, list):
+        return [_retime_json(v, offset) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out = {}
+    for k, v in value.items():
+        if k in _JSON_TIME_KEYS and isinstance(v, str):
+            try:
+                v = (datetime.fromisoformat(v) + offset).isoformat()
+            except ValueError:
+                pass
+        out[k] = _retime_json(v, offset)
+    return out
+
+
+def retime(fixture: Fixture, offset: int) -> Fixture:
+    """
+    Move a response forward in time by offset seconds.
+
+    GTFS-RT feeds are shifted by the exact offset; JSON forecasts by whole
+    hours, so hourly periods stay on the hour. A changed body gets a new
+    ETag. Other responses are returned unchanged.
+    """
+    if offset <= 0 or fixture.status != 200:
+        return fixture
+    headers = CaseInsensitiveDict(fixture.headers)
+    ctype = headers.get("Content-Type", "")
+    try:
+        if "json" in ctype:
+            hours = offset // 3600
+            if hours == 0:
+                return fixture
+            doc = _retime_json(json.loads(fixture.body), timedelta(hours=hours))
+            body = json.dumps(doc).encode("utf-8")
+        elif "gtfs" in fixture.url:
+            body = _retime_gtfs(fixture.body, offset)
+        else:
+            return fixture
+    except Exception:
+        return fixture
+    if "ETag" in headers:
+        headers["ETag"] = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    return dataclasses.replace(fixture, body=body, headers=dict(headers))
+
+
+class FixtureServer:
+    """Local HTTP stand-in for the upstream APIs, replaying a fixture store."""
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        timeout_rate: float = 0.0,
+        hang: float = 30.0,
+        shift_times: bool = True,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            store: Responses to serve
+            port: TCP port to listen on (0 picks a free port)
+            host: Address to bind (default: localhost only)
+            latency: Seconds added before every response
+            jitter: Up to this many extra seconds, uniformly random
+            error_rate: Fraction of requests answered with error_status
+            error_status: HTTP status for injected errors
+            timeout_rate: Fraction of requests left unanswered for hang
+                seconds and then dropped, to trip client timeouts
+            hang: Seconds an injected timeout holds the connection
+            shift_times: Move responses forward by their age (see retime())
+            seed: Random seed, for reproducible fault patterns
+        """
+        import http.server
+
+        self.store = store
+        self.latency = max(0.0, latency)
+        self.jitter = max(0.0, jitter)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.shift_times = shift_times
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._retimed: Dict[str, Tuple[int, Fixture]] = {}
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mini-display-replay", daemon=True)
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to --upstream."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Start serving."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving, release hung connections and close the socket."""
+        self._closing.set()
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+    def _fault(self) -> Tuple[float, str]:
+        """Pick the delay and outcome ("ok", "error" or "timeout") of one request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0.0, self.jitter)
+            roll = self._random.random()
+            if roll < self.timeout_rate:
+                self.timeouts += 1
+                return delay, "timeout"
+            if roll < self.timeout_rate + self.error_rate:
+                self.errors += 1
+                return delay, "error"
+        return delay, "ok"
+
+    def _fixture(self, url: str) -> Optional[Fixture]:
+        """The stored response for a URL, moved forward in time if enabled."""
+        fx = self.store.get(url)
+        if fx is None or not self.shift_times:
+            return fx
+        recorded = fx.recorded_at if fx.recorded_at is not None else self.started_at
+        offset = int(time.time() - recorded) // _RETIME_STEP_SEC * _RETIME_STEP_SEC
+        with self._lock:
+            cached = self._retimed.get(url)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+        fx = retime(fx, offset)
+        with self._lock:
+            self._retimed[url] = (offset, fx)
+        return fx
+
+    def _handle(self, handler) -> None:
+        """Answer one request: /HOST/PATH?QUERY serves https://HOST/PATH?QUERY."""
+        delay, outcome = self._fault()
+        if self._closing.wait(delay):
+            return
+        if outcome == "timeout":
+            self._closing.wait(self.hang)
+            handler.close_connection = True
+            return
+        if outcome == "error":
+            self._send(handler, self.error_status, {"Content-Type": "text/plain"}, b"injected error")
+            return
+        fx = self._fixture("https://" + handler.path.lstrip("/"))
+        if fx is None:
+            self._send(handler, 404, {"Content-Type": "text/plain"}, b"no fixture")
+            return
+        etag = CaseInsensitiveDict(fx.headers).get("ETag")
+        if etag and handler.headers.get("If-None-Match") == etag:
+            self._send(handler, 304, fx.headers, b"")
+            return
+        self._send(handler, fx.status, fx.headers, fx.body)
+
+    @staticmethod
+    def _send(handler, status: int, headers: Dict[str, str], body: bytes) -> None:
+        handler.send_response(status)
+        for k, v in headers.items():
+            if k.lower() not in ("connection", "content-length", "transfer-encoding"):
+                handler.send_header(k, v)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def record(
+    path: str,
+    stations: Optional[List[str]] = None,
+    route_groups: Optional[List[str]] = None,
+    zip_code: str = "11201",
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+) -> FixtureStore:
+    """
+    Fetch everything the built-in plugins use from the live services and
+    save it as a fixture store.
+
+    Plugins run with an empty HTTP cache, so every response is captured in
+    full.
+    """
+    from mini_display.plugins.subway_plugin import SubwayPlugin
+    from mini_display.plugins.weather_plugin import WeatherPlugin
+
+    store = FixtureStore()
+    with tempfile.TemporaryDirectory(prefix="mini-display-record-") as cache_dir:
+        subway = SubwayPlugin(
+            stations=stations or ["Jay St-MetroTech"],
+            route_groups=route_groups or ["A", "C", "F", "R"],
+        )
+        weather = WeatherPlugin(zip_code=zip_code, lat=lat, lon=lon, cache_dir=cache_dir)
+        with record_fixtures(store):
+            subway.refresh()
+            weather.refresh()
+    store.save(path)
+    return store
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments for the record and replay commands."""
+    p = argparse.ArgumentParser(prog="mini-display", description="Record and replay upstream responses.")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Capture live upstream responses into a fixture directory")
+    rec.add_argument("path", help="Fixture directory to write")
+    rec.add_argument("--station", action="append", help="Station name filter. Repeat for multiple. Default Jay St-MetroTech.")
+    rec.add_argument("--routes", type=str, default="A,C,F,R", help="Comma-separated route letters to consider.")
+    rec.add_argument("--zip", type=str, default="11201")
+    rec.add_argument("--lat", type=float, default=None)
+    rec.add_argument("--lon", type=float, default=None)
+
+    rep = sub.add_parser("replay", help="Serve a fixture directory as a local stand-in for the upstream APIs")
+    rep.add_argument("path", nargs="?", default=None, help="Fixture directory (default: synthetic fixtures)")
+    rep.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    rep.add_argument("--host", type=str, default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    rep.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response (default: 0)")
+    rep.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds (default: 0)")
+    rep.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status (default: 0)")
+    rep.add_argument("--error-status", type=int, default=503, help="HTTP status for injected errors (default: 503)")
+    rep.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests left hanging (default: 0)")
+    rep.add_argument("--hang", type=float, default=30.0, help="Seconds a hanging request is held (default: 30)")
+    rep.add_argument("--no-shift-times", dest="shift_times", action="store_false", help="Serve recorded timestamps unchanged")
+    rep.add_argument("--seed", type=int, default=None, help="Random seed for injected faults")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Record/replay entry point."""
+    args = parse_args(argv)
+    if args.command == "record":
+        routes = [r.strip().upper() for r in args.routes.split(",") if r.strip()]
+        store = record(args.path, stations=args.station, route_groups=routes, zip_code=args.zip, lat=args.lat, lon=args.lon)
+        for url in sorted(store.urls()):
+            print(url)
+        print(f"Recorded {len(store)} responses to {args.path}", file=sys.stderr)
+        return
+
+    store = FixtureStore.load(args.path) if args.path else synthetic_fixtures()
+    server = FixtureServer(
+        store,
+        port=args.port,
+        host=args.host,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        hang=args.hang,
+        shift_times=args.shift_times,
+        seed=args.seed,
+    )
+    server.start()
+    print(f"Serving {len(store)} responses at {server.url} (use --upstream {server.url})", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(
+            f"{server.requests} requests, {server.errors} errors, {server.timeouts} timeouts injected",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Fetch scheduler - runs plugin data refreshes on a background thread pool.
+
+The display loop never blocks on the network: each plugin's refresh() runs in
+a worker thread and publishes a new snapshot when done, and render() only
+reads the last completed snapshot.
+
+Plugins that are always on screen refresh on their own interval. For plugins
+in a rotation the display loop tells the scheduler when each one next goes on
+screen; if its data would be older than its interval by then, the refresh is
+started just early enough to finish before the slot, using the plugin's
+measured fetch latency, and it is not refreshed at all while off screen.
+Nothing is refreshed during quiet hours, except to have data ready for the
+moment they end.
+"""
+
+import dataclasses
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Collection, List, Optional, Sequence
+
+from mini_display.metrics import PLUGIN_ERRORS, TICK_SECONDS
+from mini_display.plugin_base import Plugin
+
+# Refresh lead time before any latency has been measured, and the margin
+# added on top of the estimate
+_DEFAULT_LEAD_SEC = 3.0
+_LEAD_MARGIN_SEC = 0.5
+
+_QUIET_RE = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+
+@dataclasses.dataclass(frozen=True)
+class QuietHours:
+    """Daily local-time window during which the panel is blank."""
+    start: int  # minutes after midnight
+    end: int
+
+    def remaining(self, ts: Optional[float] = None) -> float:
+        """Seconds until the window ends, or 0 if ts (default: now) is outside it."""
+        ts = time.time() if ts is None else ts
+        t = time.localtime(ts)
+        now = t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec + ts % 1.0
+        start, end = self.start * 60, self.end * 60
+        if start <= end:
+            inside = start <= now < end
+        else:
+            inside = now >= start or now < end
+        return (end - now) % 86400 if inside else 0.0
+
+
+def parse_quiet_hours(spec: str) -> QuietHours:
+    """
+    Parse a window of the form HH:MM-HH:MM; it may wrap past midnight.
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    m = _QUIET_RE.match(spec.strip())
+    if m is None:
+        raise ValueError(f"Invalid quiet hours: {spec!r}, expected HH:MM-HH:MM")
+    h1, m1, h2, m2 = (int(g) for g in m.groups())
+    if h1 > 23 or h2 > 23 or m1 > 59 or m2 > 59:
+        raise ValueError(f"Invalid quiet hours: {spec!r}, expected HH:MM-HH:MM")
+    return QuietHours(h1 * 60 + m1, h2 * 60 + m2)
+
+
+@dataclasses.dataclass
+class _Job:
+    """Scheduling state for a single plugin."""
+    plugin: Plugin
+    interval: float
+    future: Optional[Future] = None
+    last_done: float = float("-inf")
+    # When the plugin next goes on screen (None: always on screen)
+    show_at: Optional[float] = None
+    # Smoothed refresh duration and its mean deviation
+    latency: float = 0.0
+    latency_dev: float = 0.0
+    samples: int = 0
+
+    def record(self, seconds: float) -> None:
+        """Fold one refresh duration into the latency estimate."""
+        if self.samples == 0:
+            self.latency = seconds
+            self.latency_dev = seconds / 2
+        else:
+            self.latency_dev += 0.25 * (abs(seconds - self.latency) - self.latency_dev)
+            self.latency += 0.125 * (seconds - self.latency)
+        self.samples += 1
+
+    def lead(self) -> float:
+        """Seconds before it is needed that a refresh should start."""
+        if self.samples == 0:
+            return _DEFAULT_LEAD_SEC
+        return self.latency + 4 * self.latency_dev + _LEAD_MARGIN_SEC
+
+    def due(self) -> float:
+        """Monotonic time the next refresh should start (inf: not needed yet)."""
+        if self.show_at is None:
+            return self.last_done + self.interval
+        if self.last_done + self.interval >= self.show_at:
+            # Still fresh when it goes on screen; wait for the next plan
+            return float("inf")
+        return self.show_at - self.lead()
+
+
+class FetchScheduler:
+    """Refresh plugins in the background, each on its own interval."""
+
+    def __init__(
+        self,
+        plugins: List[Plugin],
+        max_workers: Optional[int] = None,
+        quiet_hours: Optional[QuietHours] = None,
+    ):
+        """
+        Create a scheduler for the given plugins.
+        
+        Args:
+            plugins: Plugins to schedule. Plugins whose refresh_interval()
+                returns None are ignored.
+            max_workers: Thread pool size (default: one per scheduled plugin)
+            quiet_hours: Daily window with no refreshes
+        """
+        self.quiet_hours = quiet_hours
+        self._jobs: List[_Job] = []
+        for plugin in plugins:
+            interval = plugin.refresh_interval()
+            if interval is not None:
+                self._jobs.append(_Job(plugin=plugin, interval=max(1.0, float(interval))))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(1, len(self._jobs)),
+            thread_name_prefix="mini-display-fetch",
+        )
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mini-display-scheduler", daemon=True)
+
+    def handles(self, plugin: Plugin) -> bool:
+        """Return True if the plugin is refreshed by this scheduler."""
+        return any(job.plugin is plugin for job in self._jobs)
+
+    def _job(self, plugin: Plugin) -> Optional[_Job]:
+        """Scheduling state of a plugin, if it is scheduled."""
+        for job in self._jobs:
+            if job.plugin is plugin:
+                return job
+        return None
+
+    def plan(self, plugin: Plugin, show_at: Optional[float]) -> None:
+        """
+        Tell the scheduler when a plugin next goes on screen.
+
+        An earlier plan that is still in the future is kept, so a plugin
+        shown in several places is ready for the first of them.
+
+        Args:
+            plugin: Plugin being shown
+            show_at: time.monotonic() at which its slot starts, or None if
+                it is always on screen
+        """
+        with self._lock:
+            self._plan(plugin, show_at, time.monotonic())
+        self._wake.set()
+
+    def _plan(self, plugin: Plugin, show_at: Optional[float], now: float) -> None:
+        job = self._job(plugin)
+        if job is None:
+            return
+        if show_at is not None and job.show_at is not None and now < job.show_at < show_at:
+            return
+        job.show_at = show_at
+
+    def plan_rotation(
+        self,
+        plugins: Sequence[Plugin],
+        current: int,
+        next_start: float,
+        cycle_seconds: float,
+        exclude: Collection[Plugin] = (),
+    ) -> None:
+        """
+        Plan a rotation with fixed-length slots.
+
+        Args:
+            plugins: Plugins in rotation order
+            current: Index of the slot on screen (or just ending)
+            next_start: time.monotonic() at which the following slot starts
+            cycle_seconds: Slot length
+            exclude: Plugins not to plan (e.g. always on screen elsewhere)
+        """
+        n = len(plugins)
+        now = time.monotonic()
+        seen = set(map(id, exclude))
+        with self._lock:
+            for k in range(1, n + 1):
+                plugin = plugins[(current + k) % n]
+                if id(plugin) in seen:
+                    continue
+                seen.add(id(plugin))
+                self._plan(plugin, next_start + (k - 1) * cycle_seconds, now)
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start the scheduler thread. All plugins are refreshed immediately."""
+        self._thread.start()
+
+    def stop(self, wait: bool = False) -> None:
+        """Stop scheduling new refreshes.
+        
+        Args:
+            wait: Block until in-flight refreshes have finished
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def _refresh(self, job: _Job) -> None:
+        """Run one refresh; errors keep the previous snapshot.
+        
+        Plugins are notified as changed when their state key moves, so the
+        display redraws promptly when fresh data arrives.
+        """
+        plugin = job.plugin
+        start = time.monotonic()
+        try:
+            before = plugin.state_key()
+            with TICK_SECONDS.labels(plugin.name).time():
+                plugin.refresh()
+            if before is None or plugin.state_key() != before:
+                plugin.notify_changed()
+        except Exception:
+            PLUGIN_ERRORS.labels(plugin.name, "refresh").inc()
+        finally:
+            with self._lock:
+                job.record(time.monotonic() - start)
+
+    def _done(self, job: _Job) -> None:
+        """Reschedule a job once its refresh has completed."""
+        with self._lock:
+            job.future = None
+            job.last_done = time.monotonic()
+        self._wake.set()
+
+    def _due(self, job: _Job, now: float) -> float:
+        """When a job should next run, pushed past quiet hours."""
+        due = job.due()
+        if self.quiet_hours is None or due == float("inf"):
+            return due
+        remaining = self.quiet_hours.remaining(time.time() + max(0.0, due - now))
+        lead = job.lead()
+        if remaining > lead:
+            # Refresh only in time for the end of the quiet window
+            due = max(due, now) + remaining - lead
+        return due
+
+    def _run(self) -> None:
+        """Scheduler loop: submit due jobs, then sleep until the next deadline."""
+        while not self._stop.is_set():
+            now = time.monotonic()
+            timeout = None
+            with self._lock:
+                for job in self._jobs:
+                    if job.future is not None:
+                        continue
+                    due = self._due(job, now)
+                    if due <= now:
+                        try:
+                            job.future = self._executor.submit(self._refresh, job)
+                        except RuntimeError:
+                            return
+                        job.future.add_done_callback(lambda _f, job=job: self._done(job))
+                        continue
+                    if due != float("inf"):
+                        wait_for = due - now
+                        timeout = wait_for if timeout is None else min(timeout, wait_for)
+            self._wake.wait(timeout)
+            self._wake.clear()
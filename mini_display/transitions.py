@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Transition engine - frame-paced crossfade and slide between plugin frames.
+
+Blending runs on NumPy arrays allocated once per engine, so each transition
+frame costs a handful of vectorized operations on preallocated buffers rather
+than per-pixel PIL work.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from PIL import Image
+
+from mini_display.metrics import DEADLINE_MISSES
+from mini_display.utils import load_numpy
+
+TRANSITIONS = ("cut", "crossfade", "slide")
+
+
+class TransitionEngine:
+    """Plays transitions between two frames at a target frame rate."""
+
+    def __init__(self, width: int, height: int, kind: str = "crossfade", duration: float = 0.5, fps: int = 30):
+        """
+        Args:
+            width: Frame width in pixels
+            height: Frame height in pixels
+            kind: One of TRANSITIONS
+            duration: Transition length in seconds
+            fps: Target frame rate (clamped to 1-60)
+        """
+        if kind not in TRANSITIONS:
+            raise ValueError(f"Unknown transition: {kind}, must be one of: {', '.join(TRANSITIONS)}")
+        np = load_numpy() if kind != "cut" else None
+        if kind != "cut" and np is None:
+            raise RuntimeError("Transitions require numpy. Install with 'pip install numpy'.")
+        self.width = width
+        self.height = height
+        self.kind = kind
+        self.duration = max(0.0, duration)
+        self.fps = max(1, min(60, int(fps)))
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self._np = np
+        if kind != "cut":
+            shape = (height, width, 3)
+            self._src = np.zeros(shape, dtype=np.uint16)
+            self._dst = np.zeros(shape, dtype=np.uint16)
+            self._acc = np.zeros(shape, dtype=np.uint16)
+            self._tmp = np.zeros(shape, dtype=np.uint16)
+            self._out = np.zeros(shape, dtype=np.uint8)
+
+    @property
+    def enabled(self) -> bool:
+        """True if transitions produce intermediate frames."""
+        return self.kind != "cut" and self.duration > 0
+
+    def load(self, src: Image.Image, dst: Image.Image) -> None:
+        """Copy the outgoing and incoming frames into the blend buffers."""
+        np = self._np
+        self._src[...] = np.asarray(src.convert("RGB"))
+        self._dst[...] = np.asarray(dst.convert("RGB"))
+
+    def blend(self, t: float) -> Image.Image:
+        """
+        Compute the transition frame at progress t (0 = src, 1 = dst).
+
+        Returns:
+            The blended frame as an RGB image
+        """
+        np = self._np
+        if self.kind == "crossfade":
+            alpha = int(round(max(0.0, min(1.0, t)) * 256))
+            np.multiply(self._src, 256 - alpha, out=self._acc)
+            np.multiply(self._dst, alpha, out=self._tmp)
+            np.add(self._acc, self._tmp, out=self._acc)
+            np.right_shift(self._acc, 8, out=self._acc)
+            np.copyto(self._out, self._acc, casting="unsafe")
+        else:
+            off = int(round(max(0.0, min(1.0, t)) * self.width))
+            np.copyto(self._out[:, :self.width - off], self._src[:, off:], casting="unsafe")
+            np.copyto(self._out[:, self.width - off:], self._dst[:, :off], casting="unsafe")
+        return Image.frombuffer("RGB", (self.width, self.height), self._out, "raw", "RGB", 0, 1)
+
+    def play(self, output, src: Image.Image, dst: Image.Image, stop_event: Optional[threading.Event] = None) -> None:
+        """
+        Present the intermediate frames of a transition on frame deadlines.
+
+        The final frame (dst) is left for the caller to present. A frame whose
+        deadline has already passed by a full period is dropped rather than
+        shown late, so the transition always ends on time.
+
+        Args:
+            output: FrameOutput to present on
+            src: Frame currently on the panel
+            dst: Frame being transitioned to
+            stop_event: Abort the transition when set
+        """
+        if not self.enabled:
+            return
+        self.load(src, dst)
+        count = max(1, int(round(self.duration * self.fps)))
+        period = 1.0 / self.fps
+        start = time.monotonic()
+        for i in range(1, count):
+            deadline = start + i * period
+            now = time.monotonic()
+            if now > deadline + period:
+                self.frames_dropped += 1
+                DEADLINE_MISSES.labels("transition").inc()
+                continue
+            if now < deadline:
+                if stop_event is not None:
+                    if stop_event.wait(deadline - now):
+                        return
+                else:
+                    time.sleep(deadline - now)
+            output.present(self.blend(i / count))
+            self.frames_shown += 1
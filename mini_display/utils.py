@@ -1,10 +1,180 @@
 #!/usr/bin/env python3
 """
 Utility functions for mini display - font rendering and helpers.
+
+Text drawing goes through a small text subsystem: fonts are loaded once and
+shared, each font gets a glyph atlas of pre-rasterized glyph masks so drawing
+a string is a series of bitmap blits, and text metrics are memoized in an LRU
+cache.
 """
 
-from typing import Tuple, Optional
-from PIL import ImageDraw, ImageFont
+import functools
+import string
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Glyphs rasterized up front when an atlas is created; others on first use
+_ATLAS_PRELOAD = string.ascii_letters + string.digits + string.punctuation + " "
+
+# Maximum number of (font, text) entries kept in the metrics cache
+METRICS_CACHE_SIZE = 512
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a fixed maximum size."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value for key, marking it most recently used."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value) -> list:
+        """Store a value, evicting the least recently used entry if full.
+        
+        Returns:
+            Values evicted to make room (usually none)
+        """
+        evicted = []
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[1])
+        return evicted
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_metrics_cache = LRUCache(METRICS_CACHE_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    """
+    Import numpy on first use.
+
+    numpy is only needed for transitions and the framebuffer backend, and
+    importing it is a large share of cold start on small boards.
+
+    Returns:
+        The numpy module, or None if it is not installed
+    """
+    try:
+        import numpy
+    except Exception:
+        return None
+    return numpy
+
+
+def metrics_cache() -> LRUCache:
+    """The shared text metrics cache (for hit-rate reporting)."""
+    return _metrics_cache
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(path: Optional[str] = None, size: Optional[int] = None) -> ImageFont.ImageFont:
+    """
+    Return a shared font instance, loading it on first use.
+    
+    Args:
+        path: TrueType font file (None for PIL's default font)
+        size: Font size in points (None for the font's default size)
+        
+    Returns:
+        Cached PIL font
+    """
+    if path is None:
+        if size is None:
+            return ImageFont.load_default()
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size or 10)
+
+
+class _Glyph:
+    """A pre-rasterized glyph mask and its placement relative to the pen."""
+    __slots__ = ("mask", "left", "top", "advance")
+
+    def __init__(self, mask: Optional[Image.Image], left: int, top: int, advance: float):
+        self.mask = mask
+        self.left = left
+        self.top = top
+        self.advance = advance
+
+
+class GlyphAtlas:
+    """Pre-rasterized glyph bitmaps for a single font."""
+
+    def __init__(self, font: ImageFont.ImageFont, preload: str = _ATLAS_PRELOAD):
+        self.font = font
+        self._glyphs: Dict[str, _Glyph] = {}
+        for ch in preload:
+            self.glyph(ch)
+
+    def glyph(self, ch: str) -> _Glyph:
+        """Return the glyph for a character, rasterizing it on first use."""
+        g = self._glyphs.get(ch)
+        if g is None:
+            left, top, right, bottom = self.font.getbbox(ch)
+            mask = None
+            if right > left and bottom > top:
+                mask = Image.new("L", (right - left, bottom - top), 0)
+                ImageDraw.Draw(mask).text((-left, -top), ch, fill=255, font=self.font)
+            g = _Glyph(mask, left, top, self.font.getlength(ch))
+            self._glyphs[ch] = g
+        return g
+
+    def draw(
+        self,
+        draw: ImageDraw.ImageDraw,
+        x: int,
+        y: int,
+        text: str,
+        color: Tuple[int, int, int],
+    ) -> None:
+        """Blit text onto a drawing surface glyph by glyph."""
+        pen = 0.0
+        for ch in text:
+            g = self.glyph(ch)
+            if g.mask is not None:
+                draw.bitmap((x + int(pen) + g.left, y + g.top), g.mask, fill=color)
+            pen += g.advance
+
+
+_atlases: "weakref.WeakKeyDictionary[ImageFont.ImageFont, GlyphAtlas]" = weakref.WeakKeyDictionary()
+_atlas_lock = threading.Lock()
+
+
+def get_atlas(font: ImageFont.ImageFont) -> GlyphAtlas:
+    """Return the shared glyph atlas for a font, building it on first use."""
+    with _atlas_lock:
+        atlas = _atlases.get(font)
+        if atlas is None:
+            atlas = GlyphAtlas(font)
+            _atlases[font] = atlas
+        return atlas
 
 
 def center_x(panel_w: int, drawn_w: int) -> int:
@@ -21,7 +191,7 @@ def draw_text(
     font: Optional[ImageFont.ImageFont] = None
 ) -> Tuple[int, int]:
     """
-    Draw text using PIL's font system (supports full character set).
+    Draw text by blitting glyphs from the font's atlas.
     
     Args:
         draw: PIL ImageDraw instance
@@ -35,13 +205,13 @@ def draw_text(
         Tuple of (width, height) in pixels
     """
     if font is None:
-        font = ImageFont.load_default()
+        font = get_font()
     
-    draw.text((x, y), text, fill=color, font=font)
-    bbox = draw.textbbox((x, y), text, font=font)
-    width = bbox[2] - bbox[0]
-    height = bbox[3] - bbox[1]
-    return width, height
+    if "\n" in text:
+        draw.text((x, y), text, fill=color, font=font)
+    else:
+        get_atlas(font).draw(draw, x, y, text, color)
+    return measure_text(text, font)
 
 
 def measure_text(
@@ -49,7 +219,7 @@ def measure_text(
     font: Optional[ImageFont.ImageFont] = None
 ) -> Tuple[int, int]:
     """
-    Measure text dimensions without drawing.
+    Measure text dimensions without drawing. Results are memoized.
     
     Args:
         text: Text to measure
@@ -59,18 +229,20 @@ def measure_text(
         Tuple of (width, height) in pixels
     """
     if font is None:
-        font = ImageFont.load_default()
+        font = get_font()
     
-    # Create a temporary draw object to measure
-    from PIL import Image
-    temp_img = Image.new("RGB", (1, 1))
-    temp_draw = ImageDraw.Draw(temp_img)
-    bbox = temp_draw.textbbox((0, 0), text, font=font)
-    width = bbox[2] - bbox[0]
-    height = bbox[3] - bbox[1]
-    return width, height
+    key = (font, text)
+    size = _metrics_cache.get(key)
+    if size is None:
+        if "\n" in text:
+            bbox = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+        else:
+            bbox = font.getbbox(text)
+        size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        _metrics_cache.put(key, size)
+    return size
 
 
 def clamp(n: int, lo: int, hi: int) -> int:
     """Clamp value between low and high bounds."""
-    return max(lo, min(hi, n))
\ No newline at end of file
+    return max(lo, min(hi, n))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Plugin workers - run plugins in their own processes.
+
+With isolation enabled each plugin's tick()/refresh() and render() run in a
+worker process, so feed parsing and JSON handling never compete with the
+display loop for the GIL and a hung plugin cannot stall the panel.
+
+Finished frames are handed back through a multiprocessing.shared_memory
+buffer holding two width x height x 3 RGB slots. The worker writes the slot
+not last published, under that slot's lock, then sends only (slot, sequence)
+over a pipe; a reader thread in the display process copies the slot into an
+image and wakes the loop. Images are never pickled.
+
+In the display process a worker is represented by a ProcessPlugin proxy,
+which behaves like any other plugin: its state key is the frame sequence
+number and render() returns the latest frame.
+
+Workers are stopped by closing the display end of a stop pipe rather than
+through a multiprocessing.Event: the worker sees end-of-file, and closing
+never blocks, even when the worker has died or hangs.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from mini_display.plugin_base import Plugin
+
+# Longest a worker sleeps between checks of a plugin with no schedule
+_IDLE_POLL_SEC = 1.0
+
+
+def _worker_main(name, kwargs, shm_name, width, height, locks, conn, stop) -> None:
+    """Worker process: refresh and render one plugin, publishing frames."""
+    from mini_display.fixtures import UPSTREAM_ENV, redirect_upstream
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    upstream = os.environ.get(UPSTREAM_ENV)
+    with contextlib.ExitStack() as stack:
+        if upstream:
+            stack.enter_context(redirect_upstream(upstream))
+        _publish_frames(name, kwargs, shm, width, height, locks, conn, stop)
+
+
+def _publish_frames(name, kwargs, shm, width, height, locks, conn, stop) -> None:
+    """Worker body: refresh and render until stopped, writing frames to shm."""
+    from mini_display.plugin_adapter import PluginAdapter
+
+    try:
+        plugin = PluginAdapter.create_plugin(name, **kwargs)
+        if plugin is None:
+            return
+        size = width * height * 3
+        canvas = Image.new("RGB", (width, height))
+        interval = plugin.refresh_interval()
+        next_refresh = 0.0
+        last_key: Any = object()
+        seq = 0
+        slot = 1
+        while not stop.poll():
+            now = time.monotonic()
+            if interval is None or now >= next_refresh:
+                try:
+                    if interval is None:
+                        plugin.tick()
+                    else:
+                        plugin.refresh()
+                except Exception:
+                    pass
+                if interval is not None:
+                    next_refresh = now + interval
+
+            key = plugin.state_key()
+            if key is None or key != last_key:
+                try:
+                    plugin.render_into(canvas, (0, 0, width, height))
+                    slot ^= 1
+                    with locks[slot]:
+                        shm.buf[slot * size:(slot + 1) * size] = canvas.tobytes()
+                    seq += 1
+                    conn.send((slot, seq))
+                    last_key = key
+                except (BrokenPipeError, EOFError, OSError):
+                    return
+                except Exception:
+                    pass
+
+            timeout = _IDLE_POLL_SEC
+            if interval is not None:
+                timeout = min(timeout, max(0.0, next_refresh - time.monotonic()))
+            change_in = plugin.seconds_until_change()
+            if change_in is not None:
+                timeout = min(timeout, max(0.01, change_in))
+            if stop.poll(timeout):
+                return
+    finally:
+        conn.close()
+        stop.close()
+        shm.close()
+
+
+class ProcessPlugin(Plugin):
+    """Display-side proxy for a plugin running in a worker process."""
+
+    def __init__(
+        self,
+        name: str,
+        kwargs: Optional[Dict[str, Any]] = None,
+        width: int = 64,
+        height: int = 32,
+        restart_delay: float = 5.0,
+    ):
+        """
+        Args:
+            name: Registered plugin name (see PluginAdapter)
+            kwargs: Picklable plugin constructor arguments
+            width: Frame width in pixels
+            height: Frame height in pixels
+            restart_delay: Seconds to wait before restarting a dead worker
+        """
+        self.name = name
+        self.kwargs = dict(kwargs or {})
+        self.width = width
+        self.height = height
+        self.restart_delay = restart_delay
+        self._ctx = multiprocessing.get_context("spawn")
+        self._size = width * height * 3
+        self._shm = shared_memory.SharedMemory(create=True, size=2 * self._size)
+        self._locks = (self._ctx.Lock(), self._ctx.Lock())
+        # (sequence, frame) published together so render() and state_key()
+        # always agree
+        self._snapshot: Tuple[int, Image.Image] = (0, Image.new("RGB", (width, height)))
+        self._process = None
+        self._stop = None
+        self._reader: Optional[threading.Thread] = None
+        self._restart_at = 0.0
+        self._closed = False
+
+    def start(self) -> None:
+        """Start (or restart) the worker process."""
+        recv, send = self._ctx.Pipe(duplex=False)
+        stop_recv, stop_send = self._ctx.Pipe(duplex=False)
+        if self._stop is not None:
+            self._stop.close()
+        # Closed to stop the worker; it is never written to
+        self._stop = stop_send
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.name, self.kwargs, self._shm.name, self.width, self.height, self._locks, send, stop_recv),
+            name=f"mini-display-{self.name}",
+            daemon=True,
+        )
+        self._process.start()
+        send.close()
+        stop_recv.close()
+        self._reader = threading.Thread(
+            target=self._read, args=(recv,), name=f"mini-display-{self.name}-frames", daemon=True
+        )
+        self._reader.start()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the worker and release the shared memory.
+
+        A worker that does not exit within timeout is terminated, then killed.
+        """
+        self._closed = True
+        if self._stop is not None:
+            self._stop.close()
+        process = self._process
+        if process is not None:
+            for end in (None, process.terminate, process.kill):
+                if not process.is_alive():
+                    break
+                if end is not None:
+                    end()
+                process.join(timeout)
+        if self._reader is not None:
+            self._reader.join(timeout)
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def alive(self) -> bool:
+        """True while the worker process is running."""
+        return self._process is not None and self._process.is_alive()
+
+    def _read(self, conn) -> None:
+        """Reader thread: copy each published frame out of shared memory."""
+        base = 0
+        while True:
+            try:
+                slot, seq = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._locks[slot]:
+                data = bytes(self._shm.buf[slot * self._size:(slot + 1) * self._size])
+            img = Image.frombytes("RGB", (self.width, self.height), data)
+            # Sequence numbers restart with the worker; keep keys increasing
+            current = self._snapshot[0]
+            if base + seq <= current:
+                base = current
+            self._snapshot = (base + seq, img)
+            self.notify_changed()
+        conn.close()
+        if not self._closed:
+            self._restart_at = time.monotonic() + self.restart_delay
+
+    def tick(self) -> None:
+        """Restart the worker if it has died."""
+        if self._closed or self._process is None or self.alive:
+            return
+        if self._reader is not None and self._reader.is_alive():
+            return
+        if time.monotonic() >= self._restart_at:
+            self.start()
+
+    def state_key(self) -> int:
+        """Sequence number of the latest frame."""
+        return self._snapshot[0]
+
+    def render(self, width: int, height: int) -> Image.Image:
+        """Return the latest frame from the worker."""
+        return self._snapshot[1]
@@ -30,7 +30,7 @@ setup(
     license="MIT",
     python_requires=">=3.8",
     install_requires=[
-        "Pillow>=9.0.0",
+        "Pillow>=9.2.0",
         "requests>=2.25.0",
         "nyct-gtfs>=1.0.0",
         "protobuf>=3.19.0",
@@ -39,10 +39,18 @@ setup(
         "rpi": [
             "rpi-rgb-led-matrix>=0.0.1",
         ],
+        "headless": [
+            "numpy>=1.20.0",
+        ],
     },
     entry_points={
         "console_scripts": [
             "mini-display=mini_display.display:main",
         ],
+        "mini_display.plugins": [
+            "clock=mini_display.plugins.clock_plugin:ClockPlugin",
+            "weather=mini_display.plugins.weather_plugin:WeatherPlugin",
+            "subway=mini_display.plugins.subway_plugin:SubwayPlugin",
+        ],
     },
 )
\ No newline at end of file
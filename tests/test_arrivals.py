@@ -0,0 +1,61 @@
+"""Tests for the packed arrival store."""
+
+import random
+
+import pytest
+
+from mini_display.arrivals import MAX_ROUTES, ArrivalHeap, ArrivalStore, pack, packed_time, unpack
+
+
+def test_pack_round_trip():
+    for epoch in (0, 1, 1_700_000_000, 2**40):
+        for route in (0, 1, MAX_ROUTES - 1):
+            for direction in ("N", "S"):
+                assert unpack(pack(epoch, route, direction)) == (epoch, route, direction)
+
+
+def test_packed_records_order_by_time():
+    assert pack(100, MAX_ROUTES - 1, "S") < pack(101, 0, "N")
+    assert packed_time(100) <= pack(100, 0, "N") < packed_time(101)
+
+
+def test_heap_keeps_earliest():
+    heap = ArrivalHeap(3)
+    for epoch in (50, 10, 40, 30, 20):
+        heap.push(pack(epoch, 0, "N"))
+    assert [unpack(r)[0] for r in heap.records()] == [10, 20, 30]
+
+
+def test_timeline_matches_brute_force():
+    rng = random.Random(7)
+    routes = ["A", "C", "F", "R"]
+    capacity = 5
+    stores = [ArrivalStore(routes, capacity) for _ in range(3)]
+    added = []
+    for store in stores:
+        for _ in range(400):
+            station = rng.randrange(4)
+            route = rng.choice(routes + ["Z"])
+            direction = rng.choice("NS")
+            epoch = 1_700_000_000 + rng.randrange(3600)
+            store.add(station, route, direction, epoch)
+            if route != "Z":
+                added.append((station, direction, pack(epoch, routes.index(route), direction)))
+
+    merged = ArrivalStore(routes, capacity)
+    for store in stores:
+        merged.update(store)
+
+    expected = []
+    for station in range(4):
+        for direction in "NS":
+            records = sorted(r for s, d, r in added if s == station and d == direction)
+            expected.extend(records[:capacity])
+    expected.sort()
+    assert merged.timeline() == expected
+
+
+def test_too_many_routes():
+    ArrivalStore([str(i) for i in range(MAX_ROUTES)], 2)
+    with pytest.raises(ValueError):
+        ArrivalStore([str(i) for i in range(MAX_ROUTES + 1)], 2)
@@ -0,0 +1,131 @@
+"""Tests for the frame server wire format."""
+
+import random
+import struct
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from mini_display.frame_server import (
+    DELTA,
+    HEARTBEAT,
+    KEY,
+    MAGIC,
+    VERSION,
+    FrameClient,
+    FrameServer,
+    apply_delta,
+    encode_delta,
+    parse_address,
+    parse_header,
+    parse_hello,
+)
+
+WIDTH, HEIGHT = 16, 8
+SIZE = WIDTH * HEIGHT * 3
+
+
+def _round_trip(prev: bytes, cur: bytes) -> bytes:
+    frame = bytearray(prev)
+    apply_delta(frame, memoryview(encode_delta(prev, cur, WIDTH * 3)))
+    return bytes(frame)
+
+
+def test_delta_round_trip():
+    rng = random.Random(3)
+    prev = bytes(rng.randrange(256) for _ in range(SIZE))
+    for _ in range(200):
+        cur = bytearray(prev)
+        for _ in range(rng.randrange(6)):
+            start = rng.randrange(SIZE)
+            stop = min(SIZE, start + rng.randrange(1, 3 * WIDTH * 2))
+            cur[start:stop] = bytes(rng.randrange(256) for _ in range(stop - start))
+        cur = bytes(cur)
+        assert _round_trip(prev, cur) == cur
+        prev = cur
+
+
+def test_delta_of_unchanged_frame_is_empty():
+    frame = bytes(range(256)) * (SIZE // 256) + bytes(SIZE % 256)
+    assert encode_delta(frame, frame, WIDTH * 3) == b""
+
+
+def test_delta_rejects_out_of_bounds_span():
+    frame = bytearray(SIZE)
+    with pytest.raises(ValueError):
+        apply_delta(frame, memoryview(struct.pack("!II", SIZE - 2, 4) + b"\1" * 4))
+    assert len(frame) == SIZE
+
+
+def test_delta_rejects_truncated_span():
+    with pytest.raises(ValueError):
+        apply_delta(bytearray(SIZE), memoryview(struct.pack("!II", 0, 8) + b"\1" * 4))
+    with pytest.raises(ValueError):
+        apply_delta(bytearray(SIZE), memoryview(b"\0\0\0"))
+
+
+def test_parse_hello():
+    assert parse_hello(struct.pack("!4sBHH", MAGIC, VERSION, 64, 32)) == (64, 32)
+    with pytest.raises(ValueError):
+        parse_hello(struct.pack("!4sBHH", b"HTTP", VERSION, 64, 32))
+    with pytest.raises(ValueError):
+        parse_hello(struct.pack("!4sBHH", MAGIC, VERSION + 1, 64, 32))
+
+
+def test_parse_header():
+    assert parse_header(struct.pack("!BI", KEY, SIZE), SIZE) == (KEY, SIZE)
+    assert parse_header(struct.pack("!BI", DELTA, 12), SIZE) == (DELTA, 12)
+    assert parse_header(struct.pack("!BI", HEARTBEAT, 0), SIZE) == (HEARTBEAT, 0)
+    with pytest.raises(ValueError):
+        parse_header(struct.pack("!BI", DELTA, SIZE + 1), SIZE)
+    with pytest.raises(ValueError):
+        parse_header(struct.pack("!BI", KEY, SIZE - 3), SIZE)
+
+
+def test_parse_address():
+    assert parse_address("7000") == ("0.0.0.0", 7000)
+    assert parse_address("hub.local:7000") == ("hub.local", 7000)
+    assert parse_address("[::1]:7000") == ("::1", 7000)
+    with pytest.raises(ValueError):
+        parse_address("hub.local")
+
+
+class _Output:
+    """Collects presented frames."""
+
+    def __init__(self):
+        self.frames = []
+
+    def present(self, img):
+        self.frames.append(img.tobytes())
+
+
+def test_client_receives_frames():
+    server = FrameServer(WIDTH, HEIGHT, 0, host="127.0.0.1")
+    server.start()
+    output = _Output()
+    client = FrameClient("127.0.0.1", server.port, output, retry_seconds=0.1)
+    thread = threading.Thread(target=client.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while server.clients == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        frames = []
+        for i, color in enumerate(((255, 0, 0), (255, 0, 0), (0, 0, 255))):
+            img = Image.new("RGB", (WIDTH, HEIGHT), color)
+            img.putpixel((i, 1), (9, 9, 9))
+            frames.append(img.tobytes())
+            server.publish(img)
+            time.sleep(0.05)
+        while output.frames[-1:] != frames[-1:] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # A client that falls behind skips to the latest frame, never a mix
+        assert output.frames[-1] == frames[-1]
+        assert all(f in frames for f in output.frames)
+    finally:
+        client.stop()
+        server.stop()
+        thread.join(5)
@@ -0,0 +1,41 @@
+"""Tests for the streaming GTFS-RT decoder."""
+
+import pytest
+
+from mini_display.fixtures import synthetic_gtfs_feed
+from mini_display.gtfs_stream import iter_arrivals
+
+nyct_gtfs = pytest.importorskip("nyct_gtfs")
+
+NOW = 1_760_000_000
+ROUTES = {"A", "C"}
+STOP_IDS = {"A41N", "A41S", "A42N"}
+
+
+def _nyct_arrivals(data: bytes, not_before: int):
+    """The same query answered through the nyct_gtfs object model."""
+    feed = nyct_gtfs.NYCTFeed("https://example.invalid/feed", fetch_immediately=False)
+    feed.load_gtfs_bytes(data)
+    for trip in feed.filter_trips(line_id=sorted(ROUTES)):
+        for stu in trip.stop_time_updates:
+            if stu.stop_id not in STOP_IDS:
+                continue
+            arr = stu.arrival or stu.departure
+            if arr is None or arr.timestamp() < not_before:
+                continue
+            yield trip.route_id, trip.direction, stu.stop_id, int(arr.timestamp())
+            break
+
+
+@pytest.mark.parametrize("not_before", [0, NOW + 600])
+def test_matches_nyct_gtfs(not_before):
+    data = synthetic_gtfs_feed(["A", "C", "E"], ["A41", "A42"], now=NOW)
+    streamed = sorted(iter_arrivals(data, ROUTES, STOP_IDS, not_before))
+    assert streamed
+    assert streamed == sorted(_nyct_arrivals(data, not_before))
+
+
+def test_skips_other_routes_and_stops():
+    data = synthetic_gtfs_feed(["A", "C", "E"], ["A41"], now=NOW)
+    assert list(iter_arrivals(data, {"E"}, {"NOPE"})) == []
+    assert all(route == "E" for route, _, _, _ in iter_arrivals(data, {"E"}, {"A41N", "A41S"}))
@@ -0,0 +1,72 @@
+"""Tests for the profiler's stage breakdown."""
+
+import pytest
+
+from mini_display.profiling import _key, stage_breakdown
+from mini_display.utils import GlyphAtlas, draw_text, get_atlas, measure_text
+
+
+class _Plugin:
+    def tick(self):
+        pass
+
+    def refresh(self):
+        pass
+
+    def render(self, width, height):
+        pass
+
+    def render_into(self, canvas, region):
+        pass
+
+
+class _Stats:
+    """Stand-in for pstats.Stats built from (caller, callee, calls, cumulative s) edges."""
+
+    def __init__(self, edges):
+        self.stats = {}
+        for caller, func, calls, ct in edges:
+            cc, nc, tt, total, callers = self.stats.get(func, (0, 0, 0.0, 0.0, {}))
+            callers[caller] = (calls, calls, 0.0, ct)
+            self.stats[func] = (cc + calls, nc + calls, tt, total + ct, callers)
+        for caller, _, _, _ in edges:
+            self.stats.setdefault(caller, (1, 1, 0.0, 0.0, {}))
+
+
+LOOP = ("loop.py", 1, "run")
+TICK, REFRESH = _key(_Plugin.tick), _key(_Plugin.refresh)
+RENDER = _key(_Plugin.render_into)
+DRAW_TEXT, MEASURE = _key(draw_text), _key(measure_text)
+GET_ATLAS, ATLAS_INIT = _key(get_atlas), _key(GlyphAtlas.__init__)
+ATLAS_DRAW, GLYPH = _key(GlyphAtlas.draw), _key(GlyphAtlas.glyph)
+SET_IMAGE = ("~", 0, "<method 'SetImage' of 'RGBMatrix' objects>")
+
+
+def test_stage_totals():
+    stats = _Stats([
+        (LOOP, TICK, 2, 4.0),
+        (TICK, REFRESH, 2, 3.0),
+        (LOOP, RENDER, 3, 10.0),
+        (RENDER, DRAW_TEXT, 6, 6.0),
+        (RENDER, MEASURE, 6, 0.5),
+        (DRAW_TEXT, MEASURE, 6, 0.25),
+        # The atlas is built (and its glyphs rendered) inside draw_text
+        (DRAW_TEXT, GET_ATLAS, 6, 2.0),
+        (GET_ATLAS, ATLAS_INIT, 1, 1.9),
+        (ATLAS_INIT, GLYPH, 90, 1.5),
+        (DRAW_TEXT, ATLAS_DRAW, 6, 3.0),
+        (ATLAS_DRAW, GLYPH, 40, 1.0),
+        (LOOP, SET_IMAGE, 3, 0.75),
+    ])
+    breakdown = stage_breakdown(stats, [_Plugin()])
+    assert breakdown["tick"] == (2, pytest.approx(4.0))
+    assert breakdown["render"] == (3, pytest.approx(10.0))
+    assert breakdown["text layout"] == (12, pytest.approx(6.5))
+    assert breakdown["image upload"] == (3, pytest.approx(0.75))
+    assert breakdown["text layout"][1] <= breakdown["render"][1]
+
+
+def test_stage_entered_from_outside_only():
+    # measure_text called straight from the loop still counts once
+    stats = _Stats([(LOOP, MEASURE, 4, 0.4), (MEASURE, GLYPH, 4, 0.1)])
+    assert stage_breakdown(stats, [_Plugin()])["text layout"] == (4, pytest.approx(0.4))
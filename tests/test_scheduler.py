@@ -0,0 +1,111 @@
+"""Tests for refresh scheduling and quiet hours."""
+
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from mini_display.backends import NullMatrix
+from mini_display.loop import DisplayLoop
+from mini_display.output import FrameOutput
+from mini_display.plugin_base import Plugin
+from mini_display.scheduler import _DEFAULT_LEAD_SEC, FetchScheduler, QuietHours, _Job, parse_quiet_hours
+
+
+class _Plugin(Plugin):
+    def __init__(self, name: str, interval: float = 60.0):
+        self.name = name
+        self.interval = interval
+
+    def refresh_interval(self):
+        return self.interval
+
+    def refresh(self):
+        pass
+
+    def render(self, width, height):
+        return Image.new("RGB", (width, height))
+
+
+def _local(hour: int, minute: int) -> float:
+    """Epoch time of a local wall-clock time on a day without DST changes."""
+    return time.mktime((2026, 1, 15, hour, minute, 0, 0, 0, -1))
+
+
+def test_rotation_refresh_starts_one_lead_before_slot():
+    job = _Job(_Plugin("a"), interval=60.0, last_done=0.0, show_at=100.0)
+    assert job.due() == pytest.approx(100.0 - _DEFAULT_LEAD_SEC)
+    job.record(1.0)
+    # latency 1 s, deviation 0.5 s, plus the margin
+    assert job.lead() == pytest.approx(3.5)
+    assert job.due() == pytest.approx(96.5)
+
+
+def test_rotation_skips_refresh_while_still_fresh():
+    job = _Job(_Plugin("a"), interval=60.0, last_done=50.0, show_at=100.0)
+    assert job.due() == float("inf")
+
+
+def test_always_shown_refreshes_on_interval():
+    job = _Job(_Plugin("a"), interval=60.0, last_done=50.0)
+    assert job.due() == 110.0
+
+
+def test_plan_rotation_orders_slots():
+    plugins = [_Plugin("a"), _Plugin("b"), _Plugin("c")]
+    scheduler = FetchScheduler(plugins)
+    start = time.monotonic() + 1000.0
+    scheduler.plan_rotation(plugins, 0, start, 10.0, exclude=[plugins[2]])
+    assert scheduler._job(plugins[1]).show_at == start
+    assert scheduler._job(plugins[2]).show_at is None
+    assert scheduler._job(plugins[0]).show_at == start + 20.0
+    scheduler.stop()
+
+
+def _run_briefly(loop: DisplayLoop) -> None:
+    timer = threading.Timer(0.2, loop.stop)
+    timer.start()
+    loop.run()
+    timer.join()
+
+
+def test_single_plugin_is_not_planned():
+    plugin = _Plugin("a")
+    scheduler = FetchScheduler([plugin])
+    _run_briefly(DisplayLoop([plugin], FrameOutput(NullMatrix(64, 32)), scheduler=scheduler))
+    assert scheduler._job(plugin).show_at is None
+    scheduler.stop()
+
+
+def test_rotation_is_planned():
+    plugins = [_Plugin("a"), _Plugin("b")]
+    scheduler = FetchScheduler(plugins)
+    _run_briefly(DisplayLoop(plugins, FrameOutput(NullMatrix(64, 32)), scheduler=scheduler))
+    assert all(scheduler._job(p).show_at is not None for p in plugins)
+    scheduler.stop()
+
+
+def test_quiet_hours_wrapping_midnight():
+    quiet = parse_quiet_hours("23:00-06:30")
+    assert quiet == QuietHours(23 * 60, 6 * 60 + 30)
+    assert quiet.remaining(_local(23, 30)) == pytest.approx(7 * 3600)
+    assert quiet.remaining(_local(3, 0)) == pytest.approx(3.5 * 3600)
+    assert quiet.remaining(_local(6, 30)) == 0.0
+    assert quiet.remaining(_local(12, 0)) == 0.0
+
+
+def test_parse_quiet_hours_rejects_malformed():
+    for spec in ("23:00", "24:00-06:00", "23:60-06:00", "late"):
+        with pytest.raises(ValueError):
+            parse_quiet_hours(spec)
+
+
+def test_refresh_deferred_to_end_of_quiet_hours(monkeypatch):
+    plugin = _Plugin("a")
+    scheduler = FetchScheduler([plugin], quiet_hours=parse_quiet_hours("23:00-06:30"))
+    monkeypatch.setattr(time, "time", lambda: _local(23, 30))
+    job = scheduler._job(plugin)
+    # Due right away, but held back until just before the window ends
+    assert scheduler._due(job, 500.0) == pytest.approx(500.0 + 7 * 3600 - job.lead())
+    scheduler.stop()